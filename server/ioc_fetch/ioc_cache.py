@@ -0,0 +1,48 @@
+import json
+import sqlite3
+import time
+
+# Results older than this are looked up again
+DEFAULT_TTL = 24 * 60 * 60
+
+
+class IOCCache:
+    """SQLite-backed cache of IP classification results with a TTL."""
+
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ioc_results ("
+            "ip TEXT PRIMARY KEY, result TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+
+    def get_many(self, ips):
+        """Return a dict of ip -> result for every IP with a fresh cache entry."""
+        cutoff = time.time() - self.ttl
+        found = {}
+        for ip in ips:
+            row = self.conn.execute(
+                "SELECT result FROM ioc_results WHERE ip = ? AND fetched_at >= ?",
+                (ip, cutoff),
+            ).fetchone()
+            if row:
+                found[ip] = json.loads(row[0])
+        return found
+
+    def put(self, result):
+        """Store one lookup result, replacing any previous entry for the IP."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ioc_results (ip, result, fetched_at) VALUES (?, ?, ?)",
+                (result["ip"], json.dumps(result), time.time()),
+            )
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
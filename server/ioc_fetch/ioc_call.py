@@ -1,5 +1,6 @@
-from playwright.sync_api import sync_playwright
-import time, os
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+import asyncio, os, re
+import httpx
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,152 +11,247 @@ PROXY_USER = os.getenv("PROXY_USER")
 PROXY_PASS = os.getenv("PROXY_PASS")
 print(f"Proxy: {PROXY_HOST}:{PROXY_PORT} User: {PROXY_USER}")
 
+# Env values are fixed for the process, so the proxy settings are built once
+_PROXY_CONFIG = None
+if PROXY_HOST and PROXY_PORT:
+    _PROXY_CONFIG = {"server": f"http://{PROXY_HOST}:{PROXY_PORT}"}
+    if PROXY_USER and PROXY_PASS:
+        _PROXY_CONFIG["username"] = PROXY_USER
+        _PROXY_CONFIG["password"] = PROXY_PASS
 
-def get_ip_info(ip):
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
+# With an API key, lookups go straight to the VirusTotal JSON API and the
+# browser scraper is only used as a fallback
+VT_API_KEY = os.getenv("VT_API_KEY")
+VT_API_URL = "https://www.virustotal.com/api/v3/ip_addresses/{ip}"
+VT_REPORT_URL = "https://www.virustotal.com/gui/ip-address/{ip}"
 
-        proxy_config = None
-        if PROXY_HOST and PROXY_PORT:
-            proxy_config = {"server": f"http://{PROXY_HOST}:{PROXY_PORT}"}
-            if PROXY_USER and PROXY_PASS:
-                proxy_config["username"] = PROXY_USER
-                proxy_config["password"] = PROXY_PASS
+# Proxies are configured per context, so the shared browser must be launched
+# with the "per-context" placeholder proxy
+BROWSER_LAUNCH_OPTIONS = {
+    "headless": True,
+    "proxy": {"server": "per-context"},
+    "args": ["--blink-settings=imagesEnabled=false"],
+}
 
-        try:
-            context = browser.new_context(proxy=proxy_config)
-            page = context.new_page()
-            page.goto("https://www.virustotal.com/gui/home/upload", timeout=30000)
-        except Exception as e:
-            print(f"[!] Proxy failed: {e}. Falling back to direct connection...")
-            context = browser.new_context()
-            page = context.new_page()
-            page.goto("https://www.virustotal.com/gui/home/upload", timeout=30000)
-
-        # Enter the IP in the search box
-        page.wait_for_selector("#searchInput, input[placeholder*='URL']", timeout=10000)
-        if page.query_selector("#searchInput"):
-            page.fill("#searchInput", ip)
-            page.keyboard.press("Enter")
-        else:
-            page.fill("input[placeholder*='URL']", ip)
-            page.keyboard.press("Enter")
-
-        time.sleep(4)  # wait for the page to render
-
-        info = page.evaluate("""
-            () => {
-                function traverse(root) {
-                    let result = {
-                        circles: [],
-                        vendorMessage: null,
-                        asn: null,
-                        org: null,
-                        country: null
-                    };
-
-                    try {
-                        // Gauge circles
-                        if(root.querySelectorAll) {
-                            for(const c of root.querySelectorAll('circle')) {
-                                let stroke = c.getAttribute('stroke') || '';
-                                let computed = getComputedStyle(c).getPropertyValue('stroke') || '';
-                                if(stroke.toLowerCase().includes('danger') ||
-                                   stroke.toLowerCase().includes('success') ||
-                                   computed.includes('255, 90, 80') ||
-                                   computed.includes('0, 128, 0')) {
-                                    result.circles.push({strokeAttr: stroke, strokeComputed: computed});
-                                }
+# Vendor verdict banner; its presence means the report has rendered
+VERDICT_SELECTOR = "div.hstack.gap-2.fw-bold.text-success, div.hstack.gap-2.fw-bold.text-danger"
+
+# Breadth-first walk over the document and every shadow root collecting the
+# verdict, ASN, organization and country into one shared result object
+_TRAVERSE_JS = r"""
+() => {
+    const VERDICT = 'div.hstack.gap-2.fw-bold.text-success, div.hstack.gap-2.fw-bold.text-danger';
+    const result = {
+        circles: [],
+        vendorMessage: null,
+        asn: null,
+        org: null,
+        country: null
+    };
+
+    // Iterative BFS: one TreeWalker pass per root, shadow roots are appended
+    // to the queue as they are met (no recursion, no per-root result merge)
+    const roots = [document];
+    try {
+        for(let i = 0; i < roots.length; i++) {
+            const walker = document.createTreeWalker(roots[i], NodeFilter.SHOW_ELEMENT);
+            for(let node = walker.nextNode(); node; node = walker.nextNode()) {
+                if(node.shadowRoot) roots.push(node.shadowRoot);
+
+                switch(node.localName) {
+                    // Gauge circles
+                    case 'circle': {
+                        const stroke = node.getAttribute('stroke') || '';
+                        if(stroke) {
+                            const lower = stroke.toLowerCase();
+                            if(lower.includes('danger') || lower.includes('success')) {
+                                result.circles.push({strokeAttr: stroke, strokeComputed: ''});
+                            }
+                        } else {
+                            // Only force a style resolution when there is no attribute
+                            const computed = getComputedStyle(node).getPropertyValue('stroke') || '';
+                            if(computed.includes('255, 90, 80') || computed.includes('0, 128, 0')) {
+                                result.circles.push({strokeAttr: '', strokeComputed: computed});
                             }
                         }
+                        break;
+                    }
 
-                        // Vendor message (malicious/benign)
-                        if(!result.vendorMessage) {
-                            const messages = root.querySelectorAll('div.hstack.gap-2.fw-bold.text-success, div.hstack.gap-2.fw-bold.text-danger');
-                            if(messages.length > 0) {
-                                result.vendorMessage = messages[0].innerText.trim();
-                            }
+                    // Vendor message (malicious/benign)
+                    case 'div':
+                        if(!result.vendorMessage && node.matches(VERDICT)) {
+                            result.vendorMessage = node.innerText.trim();
                         }
+                        break;
 
-                        // ASN, org, country (only relevant if malicious)
-                        if(!result.asn || !result.org) {
-                        // Find all <a> elements under div.hstack.gap-2
-                        const asLinks = root.querySelectorAll('div.hstack.gap-2 > a');
-                        for (const a of asLinks) {
-                            const text = a.innerText.trim();
+                    // ASN link and organization name
+                    case 'a':
+                        if(!result.asn && node.parentElement && node.parentElement.matches('div.hstack.gap-2')) {
+                            const text = node.innerText.trim();
                             if(text.startsWith("AS ")) {
-                                // Extract number after "AS "
                                 const match = text.match(/AS\s+(\d+)/);
-                                if(match){
-                                    result.asn = match[1];
-                                }
-                                break; // stop after first match
+                                if(match) result.asn = match[1];
                             }
                         }
-
-                        // Find organization name
-                        const orgSpan = root.querySelector('div.hstack.gap-2 > span a');
-                        if(orgSpan) result.org = orgSpan.innerText.trim();
-                    }
-                        if(!result.country) {
-                            const countryDiv = root.querySelector('#country');
-                            if(countryDiv) result.country = countryDiv.innerText.trim();
+                        if(!result.org && node.matches('div.hstack.gap-2 > span a')) {
+                            result.org = node.innerText.trim();
                         }
+                        break;
+                }
 
-                        // Recurse shadow roots
-                        const nodes = root.querySelectorAll ? root.querySelectorAll('*') : [];
-                        for(const n of nodes){
-                            if(n.shadowRoot){
-                                const child = traverse(n.shadowRoot);
-                                result.circles.push(...child.circles);
-                                if(!result.vendorMessage && child.vendorMessage) result.vendorMessage = child.vendorMessage;
-                                if(!result.asn && child.asn) result.asn = child.asn;
-                                if(!result.org && child.org) result.org = child.org;
-                                if(!result.country && child.country) result.country = child.country;
-                            }
-                        }
+                if(!result.country && node.id === 'country') {
+                    result.country = node.innerText.trim();
+                }
 
-                    } catch(e){}
+                if(result.vendorMessage && result.asn && result.org && result.country) {
                     return result;
                 }
-
-                return traverse(document);
-            }
-        """)
-
-        # Determine BENIGN vs MALICIOUS
-        classification = "UNKNOWN"
-        flagged_count = None
-
-        msg = info.get("vendorMessage", "")
-        if msg.lower().startswith("no security vendor"):
-            classification = "BENIGN"
-        else:
-            import re
-            m = re.match(r"(\d+)/\d+", msg)
-            if m:
-                flagged_count = int(m.group(1))
-                classification = "MALICIOUS"
-
-        browser.close()
-
-        if classification == "BENIGN":
-            return {
-                "ip": ip,
-                "classification": "BENIGN"
             }
+        }
+    } catch(e){}
+    return result;
+}
+"""
+
+_VERDICT_RE = re.compile(r"(\d+)/\d+")
+
+# Resources that play no part in the scraped fields
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "stylesheet"}
+
+
+async def _block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def _new_context(browser, proxy=None):
+    """Open a browser context that skips images, fonts, media and CSS."""
+    context = await browser.new_context(proxy=proxy)
+    await context.route("**/*", _block_heavy_resources)
+    return context
+
+
+def create_api_client():
+    """Create the HTTP client used for VirusTotal API lookups."""
+    return httpx.AsyncClient(headers={"x-apikey": VT_API_KEY}, timeout=30.0)
 
+
+async def get_ip_info_api(client, ip, sem):
+    """Look up a single IP through the VirusTotal v3 API."""
+    async with sem:
+        response = await client.get(VT_API_URL.format(ip=ip))
+    response.raise_for_status()
+    attributes = response.json()["data"]["attributes"]
+
+    flagged_count = attributes.get("last_analysis_stats", {}).get("malicious", 0)
+    if not flagged_count:
+        return {
+            "ip": ip,
+            "classification": "BENIGN"
+        }
+
+    asn = attributes.get("asn")
+    return {
+        "ip": ip,
+        "classification": "MALICIOUS",
+        "flagged": flagged_count,
+        "asn": str(asn) if asn is not None else None,
+        "org": attributes.get("as_owner"),
+        "country": attributes.get("country")
+    }
+
+
+async def open_scrape_context(browser):
+    """Open the long-lived context shared by all lookups.
+
+    Reusing one context lets pages share the HTTP/2 connection and TLS
+    session to VirusTotal instead of renegotiating per IP.
+    """
+    return await _new_context(browser, _PROXY_CONFIG)
+
+
+async def get_ip_info_async(context, ip, sem):
+    """Look up a single IP on VirusTotal in a page of the shared context.
+
+    ``sem`` bounds how many pages are open at once.
+    """
+    url = VT_REPORT_URL.format(ip=ip)
+
+    async with sem:
+        page = await context.new_page()
+        fallback = None
+        try:
+            try:
+                await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            except Exception as e:
+                if _PROXY_CONFIG is None:
+                    raise
+                print(f"[!] Proxy failed: {e}. Falling back to direct connection...")
+                await page.close()
+                fallback = await _new_context(context.browser)
+                page = await fallback.new_page()
+                await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+
+            # Wait for the verdict to render instead of a fixed delay; on
+            # timeout, still scrape whatever is there
+            try:
+                await page.wait_for_selector(VERDICT_SELECTOR, timeout=15000)
+            except PlaywrightTimeoutError:
+                pass
+
+            info = await page.evaluate(_TRAVERSE_JS)
+        finally:
+            await page.close()
+            if fallback:
+                await fallback.close()
+
+    # Determine BENIGN vs MALICIOUS; the verdict is null when the page timed
+    # out before it rendered
+    classification = "UNKNOWN"
+    flagged_count = None
+
+    msg = info.get("vendorMessage") or ""
+    if msg.lower().startswith("no security vendor"):
+        classification = "BENIGN"
+    else:
+        m = _VERDICT_RE.match(msg)
+        if m:
+            flagged_count = int(m.group(1))
+            classification = "MALICIOUS"
+
+    if classification != "MALICIOUS":
         return {
             "ip": ip,
-            "classification": "MALICIOUS",
-            "flagged": flagged_count,
-            "asn": info.get("asn"),
-            "org": info.get("org"),
-            "country": info.get("country")
+            "classification": classification
         }
 
+    return {
+        "ip": ip,
+        "classification": "MALICIOUS",
+        "flagged": flagged_count,
+        "asn": info.get("asn"),
+        "org": info.get("org"),
+        "country": info.get("country")
+    }
+
+
+async def _main(ip):
+    if VT_API_KEY:
+        async with create_api_client() as client:
+            return await get_ip_info_api(client, ip, asyncio.Semaphore(1))
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(**BROWSER_LAUNCH_OPTIONS)
+        try:
+            context = await open_scrape_context(browser)
+            return await get_ip_info_async(context, ip, asyncio.Semaphore(1))
+        finally:
+            await browser.close()
+
 
 if __name__ == "__main__":
     ip = "140.143.200.251"
-    result = get_ip_info(ip)
+    result = asyncio.run(_main(ip))
     print(result)
\ No newline at end of file
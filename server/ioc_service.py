@@ -3,8 +3,172 @@ import sys
 import time
 import csv
 import json
+import asyncio
+import ipaddress
 from datetime import datetime
-from ioc_fetch.ioc_call import get_ip_info
+from playwright.async_api import async_playwright
+from ioc_fetch.ioc_call import (
+    get_ip_info_async, get_ip_info_api, create_api_client, open_scrape_context,
+    BROWSER_LAUNCH_OPTIONS, VT_API_KEY,
+)
+from ioc_fetch.ioc_cache import IOCCache
+
+try:
+    import orjson
+
+    def _dumps(obj, indent=False):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+except ImportError:
+    def _dumps(obj, indent=False):
+        return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode("utf-8")
+
+# uvloop is optional; it speeds up the many concurrent lookup connections
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Concurrent VirusTotal lookups; kept low to avoid throttling
+MAX_CONCURRENCY = int(os.getenv("IOC_MAX_CONCURRENCY", "6"))
+
+# DEBUG prints every full result; otherwise one summary line per IP
+VERBOSE = os.getenv("IOC_LOG_LEVEL", "INFO").upper() == "DEBUG"
+
+# Number of CSV rows buffered before each write
+CSV_BATCH_SIZE = 100
+
+# Results are reused across runs until they are older than the cache TTL
+CACHE_PATH = os.getenv("IOC_CACHE_PATH", "ioc_cache.sqlite3")
+
+
+async def _lookup_each(ips, lookup, max_concurrency):
+    """Yield ``(ip, result)`` pairs as lookups complete.
+
+    ``max_concurrency`` workers pull IPs from one shared iterator, so only
+    that many lookups and unconsumed results exist at any time. A failed
+    lookup yields the exception instance as its result.
+    """
+    if not ips:
+        return
+    pending = iter(ips)
+    results = asyncio.Queue(maxsize=max_concurrency)
+
+    async def worker():
+        for ip in pending:
+            try:
+                result = await lookup(ip)
+            except Exception as e:
+                result = e
+            await results.put((ip, result))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(max_concurrency, len(ips)))]
+    try:
+        for _ in range(len(ips)):
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def fetch_all(ips, max_concurrency=MAX_CONCURRENCY):
+    """Look up all IPs, at most ``max_concurrency`` at a time.
+
+    Uses the VirusTotal API when ``VT_API_KEY`` is set, otherwise scrapes the
+    web UI in one shared browser context. Yields ``(ip, result)`` pairs in
+    completion order; failed lookups yield the exception instance.
+    """
+    sem = asyncio.Semaphore(max_concurrency)
+    if VT_API_KEY:
+        async with create_api_client() as client:
+            async for item in _lookup_each(
+                    ips, lambda ip: get_ip_info_api(client, ip, sem), max_concurrency):
+                yield item
+        return
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(**BROWSER_LAUNCH_OPTIONS)
+        try:
+            context = await open_scrape_context(browser)
+            async for item in _lookup_each(
+                    ips, lambda ip: get_ip_info_async(context, ip, sem), max_concurrency):
+                yield item
+        finally:
+            await browser.close()
+
+
+class ResultWriter:
+    """Writes each result to the console, CSV and JSONL outputs as it arrives."""
+
+    def __init__(self, csvfile, jf, total):
+        self.writer = csv.writer(csvfile)
+        self.jf = jf
+        self.total = total
+        self.count = 0
+        # CSV rows are written in batches rather than one syscall per IP
+        self.rows = []
+
+        # Write CSV header
+        self.writer.writerow(["IP", "Classification", "Flagged", "ASN", "Organization", "Country"])
+
+    def write(self, ip, result):
+        if isinstance(result, BaseException):
+            print(f"    [!] Error fetching {ip}: {result}")
+            result = {
+                "ip": ip,
+                "classification": "ERROR",
+                "flagged": None,
+                "asn": None,
+                "org": None,
+                "country": None
+            }
+
+        # Print to console
+        self.count += 1
+        print(f"[{self.count}/{self.total}] {ip} -> {result.get('classification')} "
+              f"flagged={result.get('flagged')}")
+        if VERBOSE:
+            print(f"    → {_dumps(result, indent=True).decode()}")
+
+        # Queue CSV row
+        self.rows.append([
+            result.get("ip", ""),
+            result.get("classification", ""),
+            result.get("flagged", ""),
+            result.get("asn", ""),
+            result.get("org", ""),
+            result.get("country", "")
+        ])
+        if len(self.rows) >= CSV_BATCH_SIZE:
+            self.flush()
+
+        # One JSON record per line, written as we go
+        self.jf.write(_dumps(result) + b"\n")
+
+    def flush(self):
+        """Write any queued CSV rows."""
+        self.writer.writerows(self.rows)
+        self.rows.clear()
+
+
+def is_definite(result):
+    """Whether a lookup reached a real verdict and may be cached.
+
+    UNKNOWN results, and MALICIOUS ones without a vendor count, come from
+    pages that did not render properly and are looked up again next run.
+    """
+    classification = result.get("classification")
+    return classification == "BENIGN" or (
+        classification == "MALICIOUS" and result.get("flagged") is not None)
+
+
+async def lookup_and_write(ips, out, cache):
+    """Look up ``ips``, caching and writing every result as soon as it completes."""
+    async for ip, result in fetch_all(ips):
+        if not isinstance(result, BaseException) and is_definite(result):
+            cache.put(result)
+        out.write(ip, result)
+
 
 def main():
     if len(sys.argv) != 2:
@@ -17,71 +181,63 @@ def main():
         print(f"[!] Input file not found: {input_file}")
         sys.exit(1)
 
-    # Read IPs from file
+    # Read IPs from file, dropping duplicates but keeping the original order
     with open(input_file, "r") as f:
-        ips = [line.strip() for line in f if line.strip()]
+        ips = list(dict.fromkeys(line.strip() for line in f if line.strip()))
 
     if not ips:
         print("[!] No valid IPs found in input file.")
         sys.exit(1)
 
-    print(f"[*] Starting IOC lookup for {len(ips)} IPs...\n")
-
-    # Prepare output file names
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    csv_output = f"ioc_results_{timestamp}.csv"
-    json_output = f"ioc_results_{timestamp}.json"
-    start_time = time.time()
-
-    results = []
-
-    try:
-        with open(csv_output, "w", newline="", buffering=1) as csvfile:
-            writer = csv.writer(csvfile)
-            # Write CSV header
-            writer.writerow(["IP", "Classification", "Flagged", "ASN", "Organization", "Country"])
-
-            for idx, ip in enumerate(ips, start=1):
-                print(f"[{idx}/{len(ips)}] Processing {ip}...")
+    # Malformed entries are reported as errors without being looked up
+    valid, invalid = [], {}
+    for ip in ips:
+        try:
+            ipaddress.ip_address(ip)
+            valid.append(ip)
+        except ValueError as e:
+            invalid[ip] = e
+
+    # Each lookup is cached as it completes, so an interrupted run keeps them
+    with IOCCache(CACHE_PATH) as cache:
+        cached = cache.get_many(valid)
+        misses = [ip for ip in valid if ip not in cached]
+
+        print(f"[*] Starting IOC lookup for {len(ips)} IPs "
+              f"({len(cached)} cached, {len(invalid)} invalid)...\n")
+
+        # Prepare output file names
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        csv_output = f"ioc_results_{timestamp}.csv"
+        json_output = f"ioc_results_{timestamp}.jsonl"
+        start_time = time.time()
+
+        # Rows are written as results become available: cached and invalid IPs
+        # first, then each lookup in completion order, so an interrupted run
+        # keeps everything finished so far
+        try:
+            with open(csv_output, "w", newline="") as csvfile, \
+                    open(json_output, "wb") as jf:
+                out = ResultWriter(csvfile, jf, len(ips))
                 try:
-                    result = get_ip_info(ip)  
-                except Exception as e:
-                    print(f"    [!] Error fetching {ip}: {e}")
-                    result = {
-                        "ip": ip,
-                        "classification": "ERROR",
-                        "flagged": None,
-                        "asn": None,
-                        "org": None,
-                        "country": None
-                    }
-
-                # Print to console
-                print(f"    → {json.dumps(result, indent=2)}")
-
-                # Write to CSV
-                writer.writerow([
-                    result.get("ip", ""),
-                    result.get("classification", ""),
-                    result.get("flagged", ""),
-                    result.get("asn", ""),
-                    result.get("org", ""),
-                    result.get("country", "")
-                ])
-
-                results.append(result)
-
-        with open(json_output, "w", encoding="utf-8") as jf:
-            json.dump(results, jf, indent=2, ensure_ascii=False)
-
-        elapsed = time.time() - start_time
-        print(f"\n[*] Completed IOC classification in {elapsed:.2f}s")
-        print(f"[*] CSV saved to: {csv_output}")
-        print(f"[*] JSON saved to: {json_output}")
-
-    except IOError as e:
-        print(f"[!] File write error: {e}")
-        sys.exit(1)
+                    for ip, result in cached.items():
+                        out.write(ip, result)
+                    for ip, error in invalid.items():
+                        out.write(ip, error)
+                    if misses:
+                        run = uvloop.run if uvloop is not None else asyncio.run
+                        run(lookup_and_write(misses, out, cache))
+                finally:
+                    out.flush()
+
+            elapsed = time.time() - start_time
+            print(f"\n[*] Completed IOC classification in {elapsed:.2f}s")
+            print(f"[*] CSV saved to: {csv_output}")
+            print(f"[*] JSON saved to: {json_output}")
+
+        except IOError as e:
+            print(f"[!] File write error: {e}")
+            sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -7,9 +7,10 @@ sampling rates, network topology, application profiles, and output settings.
 """
 
 import ipaddress
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from enum import Enum
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
 
 
 class SessionState(Enum):
@@ -20,66 +21,77 @@ class SessionState(Enum):
     CLOSED = 4
 
 
+@dataclass(frozen=True, slots=True)
 class ApplicationProfile:
-    """Defines realistic traffic patterns for different applications."""
-    
+    """Defines realistic traffic patterns for an application."""
+    ports: Tuple[int, ...]
+    session_duration: Tuple[float, float]      # Session length range (seconds)
+    request_size: Tuple[int, int]              # Request sizes
+    response_size: Tuple[int, int]             # Response sizes
+    requests_per_session: Tuple[int, int]      # Requests per session
+    inter_request_delay: Tuple[float, float]   # Delay between requests (seconds)
+    bidirectional_ratio: float                 # Share of requests that get a response
+
+
+APPLICATION_PROFILES: Dict[str, ApplicationProfile] = {
     # Web browsing (HTTP/HTTPS)
-    WEB = {
-        'ports': [80, 443, 8080, 8443],
-        'session_duration': (1, 30),      # 1-30 seconds
-        'request_size': (100, 2000),      # Request sizes
-        'response_size': (500, 50000),    # Response sizes  
-        'requests_per_session': (1, 20),  # Pages/resources per session
-        'inter_request_delay': (0.1, 3),  # Delay between requests
-        'bidirectional_ratio': 0.8,       # 80% bidirectional traffic
-    }
+    'web': ApplicationProfile(
+        ports=(80, 443, 8080, 8443),
+        session_duration=(1, 30),         # 1-30 seconds
+        request_size=(100, 2000),         # Request sizes
+        response_size=(500, 50000),       # Response sizes
+        requests_per_session=(1, 20),     # Pages/resources per session
+        inter_request_delay=(0.1, 3),     # Delay between requests
+        bidirectional_ratio=0.8,          # 80% bidirectional traffic
+    ),
     
     # File transfer (FTP, SFTP)
-    FILE_TRANSFER = {
-        'ports': [21, 22, 990, 989],
-        'session_duration': (10, 300),     # 10s - 5min
-        'request_size': (100, 500),
-        'response_size': (1000, 1000000),  # Large file downloads
-        'requests_per_session': (1, 5),
-        'inter_request_delay': (1, 10),
-        'bidirectional_ratio': 0.9,
-    }
+    'file_transfer': ApplicationProfile(
+        ports=(21, 22, 990, 989),
+        session_duration=(10, 300),       # 10s - 5min
+        request_size=(100, 500),
+        response_size=(1000, 1000000),    # Large file downloads
+        requests_per_session=(1, 5),
+        inter_request_delay=(1, 10),
+        bidirectional_ratio=0.9,
+    ),
     
     # Email (SMTP, IMAP, POP3)
-    EMAIL = {
-        'ports': [25, 110, 143, 993, 995],
-        'session_duration': (5, 60),
-        'request_size': (200, 1000),
-        'response_size': (500, 10000),
-        'requests_per_session': (1, 10),
-        'inter_request_delay': (1, 5),
-        'bidirectional_ratio': 0.7,
-    }
+    'email': ApplicationProfile(
+        ports=(25, 110, 143, 993, 995),
+        session_duration=(5, 60),
+        request_size=(200, 1000),
+        response_size=(500, 10000),
+        requests_per_session=(1, 10),
+        inter_request_delay=(1, 5),
+        bidirectional_ratio=0.7,
+    ),
     
     # DNS queries
-    DNS = {
-        'ports': [53],
-        'session_duration': (0.1, 1),      # Very short
-        'request_size': (50, 200),
-        'response_size': (100, 500),
-        'requests_per_session': (1, 3),
-        'inter_request_delay': (0.01, 0.1),
-        'bidirectional_ratio': 0.95,       # Almost always bidirectional
-    }
+    'dns': ApplicationProfile(
+        ports=(53,),
+        session_duration=(0.1, 1),        # Very short
+        request_size=(50, 200),
+        response_size=(100, 500),
+        requests_per_session=(1, 3),
+        inter_request_delay=(0.01, 0.1),
+        bidirectional_ratio=0.95,         # Almost always bidirectional
+    ),
     
     # Video streaming
-    VIDEO = {
-        'ports': [1935, 8080, 443],
-        'session_duration': (60, 3600),    # 1min - 1hour
-        'request_size': (100, 500),
-        'response_size': (5000, 100000),   # Large video chunks
-        'requests_per_session': (100, 3000),
-        'inter_request_delay': (0.1, 2),
-        'bidirectional_ratio': 0.9,
-    }
+    'video': ApplicationProfile(
+        ports=(1935, 8080, 443),
+        session_duration=(60, 3600),      # 1min - 1hour
+        request_size=(100, 500),
+        response_size=(5000, 100000),     # Large video chunks
+        requests_per_session=(100, 3000),
+        inter_request_delay=(0.1, 2),
+        bidirectional_ratio=0.9,
+    ),
+}
 
 
-@dataclass
+@dataclass(slots=True)
 class NetFlowConfig:
     """Configuration for realistic NetFlow v9 simulator."""
     
@@ -91,6 +103,11 @@ class NetFlowConfig:
     # Sampling Configuration
     sampling_rate: int = 10          # Sample 1 out of every N flows (1:N ratio)
     enable_sampling: bool = True      # Enable/disable flow sampling
+    adaptive_sampling: bool = False   # Back off the rate while the traffic mix is stable
+    max_sampling_rate: int = 100      # Upper bound for the adaptive rate
+    checkpoint_window: int = 1000     # Flows between adaptive drift checks
+    checkpoint_trial: int = 500       # Flows in each drift check
+    drift_threshold: float = 0.1      # Hellinger distance that counts as drift
     
     # Traffic Generation Settings
     sessions_per_minute: int = 80     # New sessions started per minute
@@ -103,6 +120,8 @@ class NetFlowConfig:
     # NetFlow Export Settings
     template_refresh: int = 20        # Send template every N packets
     max_flows_per_packet: int = 50    # Maximum flows per NetFlow packet
+    export_flush_interval: float = 2.0  # Max seconds flows wait to fill a packet
+    exporter_workers: int = 1         # UDP export channels (source IDs source_id..+N-1)
     
     # Realism Settings
     enable_bidirectional: bool = True         # Enable bidirectional flows
@@ -139,6 +158,24 @@ class NetFlowConfig:
     batch_size: int = 300             # Process flows in batches
     memory_limit_mb: int = 512        # Memory limit for flow cache
     
+    # Streaming Options
+    stream_enabled: bool = True       # Broadcast flows as JSONL over TCP
+    stream_host: str = "0.0.0.0"      # Bind host for the JSONL streamer
+    stream_port: int = 9999           # Bind port for the JSONL streamer
+    listen: bool = False              # Run the simple listener instead of the simulator
+    
+    # Parsed network caches, built on first use (not part of the saved config)
+    _internal_nets: Optional[List[ipaddress.IPv4Network]] = field(
+        default=None, init=False, repr=False, compare=False)
+    _external_nets: Optional[List[ipaddress.IPv4Network]] = field(
+        default=None, init=False, repr=False, compare=False)
+    _network_index: Optional[List[Tuple[int, Dict[int, str]]]] = field(
+        default=None, init=False, repr=False, compare=False)
+    _profiles: Mapping[str, ApplicationProfile] = field(
+        default=None, init=False, repr=False, compare=False)
+    _weight_choices: Tuple[List[str], List[float]] = field(
+        default=None, init=False, repr=False, compare=False)
+    
     def __post_init__(self):
         """Initialize default values for complex fields."""
         
@@ -170,24 +207,57 @@ class NetFlowConfig:
                 'email': 0.10,        # 10% email traffic
                 'file_transfer': 0.05  # 5% file transfers
             }
+        
+        # Resolved once; read-only so callers cannot mutate the shared profiles
+        self._profiles = MappingProxyType(dict(APPLICATION_PROFILES))
+        self._weight_choices = (list(self.application_weights.keys()),
+                                list(self.application_weights.values()))
     
     def get_internal_networks(self) -> List[ipaddress.IPv4Network]:
-        """Convert internal network strings to IPv4Network objects."""
-        return [ipaddress.ip_network(net) for net in self.internal_networks]
+        """Convert internal network strings to IPv4Network objects (parsed once)."""
+        if self._internal_nets is None:
+            self._internal_nets = [ipaddress.ip_network(net) for net in self.internal_networks]
+        return self._internal_nets
     
     def get_external_networks(self) -> List[ipaddress.IPv4Network]:
-        """Convert external network strings to IPv4Network objects."""
-        return [ipaddress.ip_network(net) for net in self.external_networks]
+        """Convert external network strings to IPv4Network objects (parsed once)."""
+        if self._external_nets is None:
+            self._external_nets = [ipaddress.ip_network(net) for net in self.external_networks]
+        return self._external_nets
     
-    def get_application_profiles(self) -> Dict[str, dict]:
-        """Get application profiles dictionary."""
-        return {
-            'web': ApplicationProfile.WEB,
-            'file_transfer': ApplicationProfile.FILE_TRANSFER,
-            'email': ApplicationProfile.EMAIL,
-            'dns': ApplicationProfile.DNS,
-            'video': ApplicationProfile.VIDEO,
-        }
+    def classify_ip(self, ip: str) -> Optional[str]:
+        """Return 'internal', 'external' or None for an IPv4 address.
+        
+        Uses a longest-prefix match over per-prefix-length hash tables, so a
+        lookup costs one dict probe per distinct prefix length rather than a
+        scan over every network.
+        """
+        if self._network_index is None:
+            tables: Dict[int, Dict[int, str]] = {}
+            # Internal networks are inserted last so they win on identical prefixes
+            for label, networks in (('external', self.get_external_networks()),
+                                    ('internal', self.get_internal_networks())):
+                for net in networks:
+                    tables.setdefault(net.prefixlen, {})[int(net.network_address)] = label
+            self._network_index = [
+                ((0xFFFFFFFF << (32 - prefixlen)) & 0xFFFFFFFF, table)
+                for prefixlen, table in sorted(tables.items(), reverse=True)
+            ]
+        
+        addr = int(ipaddress.IPv4Address(ip))
+        for mask, table in self._network_index:
+            label = table.get(addr & mask)
+            if label:
+                return label
+        return None
+    
+    def get_application_profiles(self) -> Mapping[str, ApplicationProfile]:
+        """Get read-only application profiles mapping."""
+        return self._profiles
+    
+    def get_application_choices(self) -> Tuple[List[str], List[float]]:
+        """Get (application names, weights) ready for random.choices()."""
+        return self._weight_choices
     
     def validate(self) -> List[str]:
         """Validate configuration and return list of errors."""
@@ -196,6 +266,13 @@ class NetFlowConfig:
         # Validate sampling rate
         if self.sampling_rate < 1:
             errors.append("Sampling rate must be >= 1")
+        if self.adaptive_sampling:
+            if self.max_sampling_rate < self.sampling_rate:
+                errors.append("max_sampling_rate must be >= sampling_rate")
+            if self.checkpoint_window < 1 or self.checkpoint_trial < 1:
+                errors.append("checkpoint_window and checkpoint_trial must be >= 1")
+            if not 0 < self.drift_threshold <= 1:
+                errors.append("drift_threshold must be in (0, 1]")
         
         # Validate timeouts
         if self.active_timeout <= 0:
@@ -203,6 +280,14 @@ class NetFlowConfig:
         if self.inactive_timeout <= 0:
             errors.append("Inactive timeout must be > 0")
         
+        # Validate export batching
+        if self.max_flows_per_packet < 1:
+            errors.append("max_flows_per_packet must be >= 1")
+        if self.export_flush_interval < 0:
+            errors.append("export_flush_interval must be >= 0")
+        if self.exporter_workers < 1:
+            errors.append("exporter_workers must be >= 1")
+        
         # Validate application weights
         if self.application_weights:
             total_weight = sum(self.application_weights.values())
@@ -236,7 +321,10 @@ class NetFlowConfig:
     def to_dict(self) -> dict:
         """Convert config to dictionary for serialization."""
         config_dict = {}
-        for key, value in self.__dict__.items():
+        for f in fields(self):
+            if not f.init:
+                continue
+            key, value = f.name, getattr(self, f.name)
             if isinstance(value, (str, int, float, bool, list, dict)):
                 config_dict[key] = value
             else:
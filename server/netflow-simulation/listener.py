@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 import sys,socket
 def main(h='127.0.0.1',p=9999):
+    # Pass bytes straight through; no decode/re-encode or line splitting
+    sys.stdout.flush(); out=sys.stdout.buffer
     with socket.create_connection((h,int(p))) as s:
-        f=s.makefile('r',encoding='utf-8',errors='replace')
         try:
-            for line in f:
-                if not line: break
-                print(line.rstrip())
+            while True:
+                data=s.recv(65536)
+                if not data: break
+                out.write(data); out.flush()
         except KeyboardInterrupt:
             pass
 if __name__=='__main__':
@@ -7,13 +7,17 @@ import socket
 import struct
 import time
 import csv
+import argparse
 import logging
+import math
 import signal
-from collections import namedtuple
-from dataclasses import dataclass
+from collections import Counter
+from functools import lru_cache
+from itertools import accumulate, islice
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Set, Tuple, Optional
 
 # Import configuration
 from config import (
@@ -21,13 +25,76 @@ from config import (
     PROTOCOLS, NETFLOW_VERSION, TEMPLATE_FLOWSET_ID,FIELD_TYPES,ApplicationProfile,
 )
 
-# Flow key for tracking
-FlowKey = namedtuple('FlowKey', [
-    'src_ip', 'dst_ip', 'src_port', 'dst_port', 'protocol'
-])
+# orjson is optional; it is several times faster and emits bytes directly
+try:
+    import orjson
 
+    def json_line(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+except ImportError:
+    def json_line(obj) -> bytes:
+        return (json.dumps(obj) + '\n').encode('utf-8')
 
-@dataclass
+# uvloop is optional; it gives the streaming TCP path a faster event loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+@lru_cache(maxsize=65536)
+def ip_to_int(ip: str) -> int:
+    """Dotted-quad IPv4 address as an int; the simulated host pool is small."""
+    return int.from_bytes(socket.inet_aton(ip), 'big')
+
+
+def now_ms() -> int:
+    """Wall-clock time in integer milliseconds, without float math."""
+    return time.time_ns() // 1_000_000
+
+
+def encode_jsonl(flows) -> bytes:
+    """Serialize FlowRecords as newline-terminated JSON lines."""
+    return b"".join([json_line(flow.to_dict()) for flow in flows])
+
+
+# Precompiled NetFlow v9 wire structs, so format strings are parsed once
+NETFLOW_HEADER_STRUCT = struct.Struct('!HHIIIII')
+NETFLOW_FLOWSET_HDR = struct.Struct('!HH')
+NETFLOW_FIELD_STRUCT = struct.Struct('!HH')
+# Data record, in template field order (29 bytes)
+NETFLOW_RECORD_STRUCT = struct.Struct('!IIHHBIIII')
+RECORD_SIZE = NETFLOW_RECORD_STRUCT.size
+DATA_PACKET_HEADER_SIZE = NETFLOW_HEADER_STRUCT.size + NETFLOW_FLOWSET_HDR.size
+
+# Most records that fit one unfragmented datagram on a 1500-byte MTU link
+# (1472 bytes of UDP payload)
+MTU_RECORDS_PER_PACKET = (1472 - DATA_PACKET_HEADER_SIZE) // RECORD_SIZE
+
+# Client-side port range and how many ports are drawn per refill
+EPHEMERAL_PORTS = range(1024, 65536)
+PORT_POOL_SIZE = 4096
+
+# Seconds between status lines in the main loop
+STATUS_INTERVAL = 30.0
+
+# Kernel send buffer for the exporter's UDP socket
+UDP_SEND_BUFFER = 4 * 1024 * 1024
+
+# Seconds a client may take to drain one broadcast before it is dropped
+STREAM_DRAIN_TIMEOUT = 1.0
+
+# Broadcast output is coalesced and sent once this many bytes are pending,
+# or every STREAM_FLUSH_INTERVAL seconds otherwise
+STREAM_FLUSH_BYTES = 1 << 16
+STREAM_FLUSH_INTERVAL = 0.05
+
+# Flow key for tracking: (src_ip_int, dst_ip_int, src_port, dst_port, protocol).
+# A plain tuple of ints is cheaper to build and hash than one holding strings
+FlowKey = Tuple[int, int, int, int, int]
+
+
+@dataclass(slots=True)
 class FlowRecord:
     """NetFlow v9 flow record with simplified fields."""
     src_ip: str
@@ -41,18 +108,27 @@ class FlowRecord:
     last_switched: int = 0
     flow_id: str = ""
     first_packet_time: float = 0.0
+    # Integer forms of the addresses, derived once for packet export
+    src_ip_int: int = field(default=0, repr=False)
+    dst_ip_int: int = field(default=0, repr=False)
 
     def __post_init__(self):
-        if self.first_switched == 0:
-            self.first_switched = int(time.time() * 1000)
+        if not self.src_ip_int:
+            self.src_ip_int = ip_to_int(self.src_ip)
+        if not self.dst_ip_int:
+            self.dst_ip_int = ip_to_int(self.dst_ip)
+        if self.first_switched == 0 or self.first_packet_time == 0.0:
+            now = time.time()
+            if self.first_switched == 0:
+                self.first_switched = int(now * 1000)
+            if self.first_packet_time == 0.0:
+                self.first_packet_time = now
         if self.last_switched == 0:
             self.last_switched = self.first_switched
-        if self.first_packet_time == 0.0:
-            self.first_packet_time = time.time()
 
     def to_dict(self) -> dict:
         """Convert flow record to dictionary."""
-        data = {
+        return {
             'src_ip': self.src_ip,
             'dst_ip': self.dst_ip,
             'src_port': self.src_port,
@@ -62,23 +138,19 @@ class FlowRecord:
             'bytes': self.bytes,
             'first_switched': self.first_switched,
             'last_switched': self.last_switched,
-            'flow_id': self.flow_id
+            'flow_id': self.flow_id,
+            'duration_ms': self.last_switched - self.first_switched
         }
 
-        # Calculate duration in milliseconds
-        data['duration_ms'] = self.last_switched - self.first_switched
-
-        return data
 
-
-@dataclass
+@dataclass(slots=True)
 class NetworkSession:
     """Represents a realistic network session with multiple flows."""
     session_id: str
     src_ip: str
     dst_ip: str
     application: str
-    profile: dict
+    profile: ApplicationProfile
     start_time: float
     state: SessionState = SessionState.SYN_SENT
     requests_sent: int = 0
@@ -89,7 +161,7 @@ class NetworkSession:
         if self.last_activity == 0:
             self.last_activity = self.start_time
         if self.total_requests == 0:
-            min_req, max_req = self.profile['requests_per_session']
+            min_req, max_req = self.profile.requests_per_session
             self.total_requests = random.randint(min_req, max_req)
 
 
@@ -100,34 +172,37 @@ class FlowStreamer:
         self.host = host
         self.port = port
         self.server: Optional[asyncio.base_events.Server] = None
-        self.clients: List[asyncio.StreamWriter] = []
+        self.clients: Set[asyncio.StreamWriter] = set()
         self.lock = asyncio.Lock()
         self.logger = logging.getLogger("FlowStreamer")
         self._serving_task: Optional[asyncio.Task] = None
+        self._buffer = bytearray()
+        self._flush_task: Optional[asyncio.Task] = None
+        # Set once STREAM_FLUSH_BYTES are buffered to flush before the timer
+        self._flush_wanted = asyncio.Event()
 
     async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
         """Accept client and keep the connection until it disconnects."""
         peer = writer.get_extra_info("peername")
-        self.logger.info(f"Client connected: {peer}")
+        self.logger.info("Client connected: %s", peer)
         async with self.lock:
-            self.clients.append(writer)
+            self.clients.add(writer)
 
         try:
             # Keep the connection open until the client closes.
             # We won't read from the client; just wait for EOF.
             await reader.read()  # returns b'' when client disconnects
         except Exception as e:
-            self.logger.debug(f"Client {peer} read error: {e}")
+            self.logger.debug("Client %s read error: %s", peer, e)
         finally:
             async with self.lock:
-                if writer in self.clients:
-                    self.clients.remove(writer)
+                self.clients.discard(writer)
             try:
                 writer.close()
                 await writer.wait_closed()
             except Exception:
                 pass
-            self.logger.info(f"Client disconnected: {peer}")
+            self.logger.info("Client disconnected: %s", peer)
 
     async def start(self):
         """Start the TCP server."""
@@ -135,9 +210,10 @@ class FlowStreamer:
             return
         self.server = await asyncio.start_server(self._handle_client, self.host, self.port)
         addr = ", ".join(str(sock.getsockname()) for sock in self.server.sockets or [])
-        self.logger.info(f"FlowStreamer listening on {addr}")
+        self.logger.info("FlowStreamer listening on %s", addr)
         # Run server. Keep a background task so start() doesn't block (main loop will continue).
         self._serving_task = asyncio.create_task(self.server.serve_forever())
+        self._flush_task = asyncio.create_task(self._flush_loop())
 
     async def stop(self):
         """Stop the server and close all client connections."""
@@ -152,12 +228,24 @@ class FlowStreamer:
             except asyncio.CancelledError:
                 pass
             self._serving_task = None
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        # Deliver anything still buffered before the clients are closed
+        await self.flush()
 
         async with self.lock:
             for w in list(self.clients):
                 try:
                     w.close()
-                    await w.wait_closed()
+                    await asyncio.wait_for(w.wait_closed(), STREAM_DRAIN_TIMEOUT)
+                except asyncio.TimeoutError:
+                    w.transport.abort()
                 except Exception:
                     pass
             self.clients.clear()
@@ -180,31 +268,85 @@ class FlowStreamer:
                     obj = dict(f)
                 except Exception:
                     obj = {"raw": str(f)}
-            lines.append(json.dumps(obj))
-        payload = ("\n".join(lines) + "\n").encode("utf-8")
+            lines.append(json_line(obj))
+        self.broadcast_bytes(b"".join(lines))
+
+    def broadcast_bytes(self, payload: bytes):
+        """Queue already-serialized JSONL for all connected clients.
+
+        This only appends to the buffer; the flush task sends it on its next
+        run, or straight away once STREAM_FLUSH_BYTES are pending, so callers
+        never wait on client writes.
+        """
+        if not payload:
+            return
+        self._buffer += payload
+        if len(self._buffer) >= STREAM_FLUSH_BYTES:
+            self._flush_wanted.set()
+
+    async def flush(self):
+        """Send all buffered output to the connected clients."""
+        if not self._buffer:
+            return
+        payload = bytes(self._buffer)
+        self._buffer.clear()
+        await self._send(payload)
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_wanted.wait(), STREAM_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wanted.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                self.logger.debug("Periodic flush error: %s", e)
 
-        # Send to all clients concurrently, pruning dead ones
+    async def _send(self, payload: bytes):
+        """Write ``payload`` to every client and drain them concurrently."""
+
+        # Queue the payload on every client under the lock, then drain them
+        # concurrently outside it so one slow peer does not hold up the rest
+        to_remove = set()
+        alive = []
         async with self.lock:
-            to_remove = []
             for w in self.clients:
+                # Skip clients already past their transport's high-water mark;
+                # drain() would only block on them
+                transport = w.transport
+                if transport.get_write_buffer_size() > transport.get_write_buffer_limits()[1]:
+                    self.logger.debug("Skipping broadcast to slow client")
+                    continue
                 try:
                     w.write(payload)
-                    await w.drain()
-                except (ConnectionResetError, BrokenPipeError, asyncio.CancelledError):
-                    # mark for removal
-                    to_remove.append(w)
+                    alive.append(w)
                 except Exception as e:
-                    self.logger.debug(f"Broadcast write error: {e}")
-                    to_remove.append(w)
-
-            for w in to_remove:
-                try:
-                    if w in self.clients:
-                        self.clients.remove(w)
-                    w.close()
-                    await w.wait_closed()
-                except Exception:
-                    pass
+                    self.logger.debug("Broadcast write error: %s", e)
+                    to_remove.add(w)
+
+        # Each drain is bounded, so a stalled peer costs at most
+        # STREAM_DRAIN_TIMEOUT and is then dropped
+        results = await asyncio.gather(
+            *(asyncio.wait_for(w.drain(), STREAM_DRAIN_TIMEOUT) for w in alive),
+            return_exceptions=True)
+        for w, result in zip(alive, results):
+            if isinstance(result, asyncio.TimeoutError):
+                self.logger.info("Dropping client that stopped reading: %s",
+                                 w.get_extra_info("peername"))
+                to_remove.add(w)
+            elif isinstance(result, BaseException):
+                self.logger.debug("Broadcast drain error: %s", result)
+                to_remove.add(w)
+
+        if not to_remove:
+            return
+        async with self.lock:
+            self.clients -= to_remove
+        for w in to_remove:
+            # abort() discards the unsent backlog; close() would wait on it
+            w.transport.abort()
 
 
 class FlowSampler:
@@ -212,35 +354,128 @@ class FlowSampler:
 
     def __init__(self, config: NetFlowConfig):
         self.config = config
+        self.enabled = config.enable_sampling
+        self.rate = config.sampling_rate
         self.sample_counter = 0
         self.total_flows = 0
         self.sampled_flows = 0
 
     def should_sample(self) -> bool:
         """Determine if the current flow should be sampled."""
-        if not self.config.enable_sampling:
+        if not self.enabled:
             return True
 
         self.total_flows += 1
-        self.sample_counter += 1
+        counter = self.sample_counter + 1
 
-        if self.sample_counter >= self.config.sampling_rate:
+        if counter >= self.rate:
             self.sample_counter = 0
             self.sampled_flows += 1
             return True
 
+        self.sample_counter = counter
         return False
 
+    def sample(self, flows: List) -> List:
+        """Sample a batch of flows, equivalent to should_sample() per flow."""
+        if not self.enabled:
+            return flows
+
+        # Every rate-th flow counting on from where the last batch stopped
+        sampled = flows[self.rate - 1 - self.sample_counter::self.rate]
+        self.sample_counter = (self.sample_counter + len(flows)) % self.rate
+        self.total_flows += len(flows)
+        self.sampled_flows += len(sampled)
+        return sampled
+
     def get_stats(self) -> dict:
         """Get sampling statistics."""
         return {
             'total_flows': self.total_flows,
             'sampled_flows': self.sampled_flows,
-            'sampling_rate': self.config.sampling_rate,
+            'sampling_rate': self.rate,
             'actual_ratio': self.sampled_flows / max(self.total_flows, 1)
         }
 
 
+def hellinger(p: Counter, q: Counter) -> float:
+    """Hellinger distance between the distributions behind two counters."""
+    p_total = sum(p.values())
+    q_total = sum(q.values())
+    if not p_total or not q_total:
+        return 0.0
+    overlap = sum(math.sqrt(p[key] * q[key]) for key in p.keys() & q.keys())
+    return math.sqrt(max(0.0, 1.0 - overlap / math.sqrt(p_total * q_total)))
+
+
+class CheckpointSmoothedSampler(FlowSampler):
+    """Flow sampler that backs off its rate while the traffic mix is stable.
+
+    A main estimate of how often each service (protocol, lower port) appears
+    covers the flows since the last drift. Every ``checkpoint_window`` flows a
+    trial estimate starts alongside it; after ``checkpoint_trial`` flows the two
+    are compared by Hellinger distance. Drift beyond ``drift_threshold`` makes
+    the trial the new main estimate and restores the configured rate; no drift
+    doubles the rate, up to ``max_sampling_rate``.
+    """
+
+    def __init__(self, config: NetFlowConfig):
+        super().__init__(config)
+        self.base_rate = config.sampling_rate
+        self.max_rate = max(config.max_sampling_rate, self.base_rate)
+        self.window = config.checkpoint_window
+        self.trial_size = config.checkpoint_trial
+        self.threshold = config.drift_threshold
+
+        self.main_counts: Counter = Counter()
+        self.trial_counts: Optional[Counter] = None
+        self.trial_seen = 0
+        self.until_checkpoint = self.window
+        self.logger = logging.getLogger('FlowSampler')
+
+    def sample(self, flows: List) -> List:
+        """Record the batch in the estimates, then sample at the current rate."""
+        if self.enabled and flows:
+            self._observe([(f.protocol, min(f.src_port, f.dst_port)) for f in flows])
+        return super().sample(flows)
+
+    def _observe(self, keys: List[Tuple[int, int]]):
+        while keys:
+            if self.trial_counts is None:
+                take = min(len(keys), self.until_checkpoint)
+                self.main_counts.update(keys[:take])
+                self.until_checkpoint -= take
+                if not self.until_checkpoint:
+                    self.trial_counts = Counter()
+                    self.trial_seen = 0
+            else:
+                take = min(len(keys), self.trial_size - self.trial_seen)
+                self.main_counts.update(keys[:take])
+                self.trial_counts.update(keys[:take])
+                self.trial_seen += take
+                if self.trial_seen >= self.trial_size:
+                    self._checkpoint()
+            keys = keys[take:]
+
+    def _checkpoint(self):
+        previous_rate = self.rate
+        distance = hellinger(self.main_counts, self.trial_counts)
+        if distance > self.threshold:
+            self.main_counts = self.trial_counts
+            self.rate = self.base_rate
+        else:
+            self.rate = min(self.rate * 2, self.max_rate)
+
+        # The new rate applies from the batch being sampled, which starts at
+        # flow total_flows; logging it lets sampled counts be scaled back up
+        if self.rate != previous_rate:
+            self.logger.info("Sampling rate 1:%d -> 1:%d from flow %d (drift %.3f)",
+                             previous_rate, self.rate, self.total_flows, distance)
+        self.sample_counter = min(self.sample_counter, self.rate - 1)
+        self.trial_counts = None
+        self.until_checkpoint = self.window
+
+
 class FlowDataStorage:
     """Enhanced storage with flow sampling support."""
 
@@ -257,27 +492,36 @@ class FlowDataStorage:
             self.csv_file = None
         else:
             self.flow_file = self.output_path / f"flows_{timestamp}.jsonl"
+            self.jsonl_file = None
 
         self.flows_written = 0
 
-    def write_flows(self, flows: List[FlowRecord]):
-        """Write flows to file."""
+    def write_flows(self, flows: List[FlowRecord], payload: Optional[bytes] = None):
+        """Write flows to file.
+
+        ``payload`` may carry the flows already encoded as JSONL, so callers
+        that also stream them only serialize once.
+        """
         if not flows:
             return
 
         if self.config.output_format == 'csv':
             self._write_csv(flows)
         else:
-            self._write_jsonl(flows)
+            self._write_jsonl(flows, payload)
 
         self.flows_written += len(flows)
 
-    def _write_jsonl(self, flows: List[FlowRecord]):
+    def _write_jsonl(self, flows: List[FlowRecord], payload: Optional[bytes] = None):
         """Write flows to JSONL file."""
-        with open(self.flow_file, 'a') as f:
-            for flow in flows:
-                json.dump(flow.to_dict(), f)
-                f.write('\n')
+        if payload is None:
+            payload = encode_jsonl(flows)
+
+        # Opened on first write and kept open for the rest of the run
+        if self.jsonl_file is None:
+            self.jsonl_file = open(self.flow_file, 'ab')
+        self.jsonl_file.write(payload)
+        self.jsonl_file.flush()
 
     def _write_csv(self, flows: List[FlowRecord]):
         """Write flows to CSV file."""
@@ -292,8 +536,7 @@ class FlowDataStorage:
             self.csv_writer.writeheader()
 
         # Write flow records
-        for flow in flows:
-            self.csv_writer.writerow(flow.to_dict())
+        self.csv_writer.writerows(flow.to_dict() for flow in flows)
 
         self.csv_file.flush()
 
@@ -301,49 +544,60 @@ class FlowDataStorage:
         """Close file handles."""
         if hasattr(self, 'csv_file') and self.csv_file:
             self.csv_file.close()
+        if getattr(self, 'jsonl_file', None):
+            self.jsonl_file.close()
 
 
-class NetFlowV9Exporter:
-    """NetFlow v9 packet exporter following RFC 3954."""
+class ExportChannel:
+    """One UDP socket exporting NetFlow v9 packets under its own source ID.
 
-    def __init__(self, config: NetFlowConfig):
+    Sequence numbers and template state are per observation domain (RFC 3954),
+    so every channel tracks its own. With ``local_port`` set the socket is
+    bound there with SO_REUSEPORT, letting several channels share one source
+    address towards the collector.
+    """
+
+    def __init__(self, config: NetFlowConfig, source_id: int, local_port: Optional[int] = None):
         self.config = config
+        self.source_id = source_id
         self.sequence = 0
         self.template_id = 256
+        self.template_flowset = self._build_template_flowset()
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Never block the event loop on a full send buffer; a packet that
+        # does not fit is dropped, as it would be on a congested link
+        try:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, UDP_SEND_BUFFER)
+        except OSError:
+            pass
+        if local_port is not None:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            self.socket.bind(('', local_port))
+        self.socket.setblocking(False)
         self.template_sent = False
         self.packets_sent = 0
+        self.packets_dropped = 0
+        self.records_per_packet = min(config.max_flows_per_packet, MTU_RECORDS_PER_PACKET)
         self.logger = logging.getLogger('NetFlowExporter')
 
-        # Initialize storage and sampler
-        self.storage = FlowDataStorage(config) if config.save_flows else None
-        self.sampler = FlowSampler(config)
-
-        # optional streamer attribute — will be attached externally if streaming enabled
-        self.streamer: Optional[FlowStreamer] = None
-
-    def create_template_packet(self) -> bytes:
-        """Create NetFlow v9 template packet."""
-        # NetFlow v9 Header (20 bytes)
-        version = NETFLOW_VERSION
-        count = 1  # Number of flowsets
-        sys_uptime = int(time.time() * 1000) & 0xFFFFFFFF
-        unix_secs = int(time.time())
-        sequence_number = self.sequence
-        source_id = self.config.source_id
+    @property
+    def local_port(self) -> int:
+        return self.socket.getsockname()[1]
 
-        header = struct.pack('!HHIIIII',
-                             version, count, sys_uptime, unix_secs,
-                             sequence_number, source_id, 0)
+    def _build_template_flowset(self) -> bytes:
+        """Template FlowSet describing the data record layout.
 
+        It never changes for a channel, so it is built once and every
+        template packet reuses the bytes.
+        """
         # Template FlowSet Header (4 bytes)
         flowset_id = TEMPLATE_FLOWSET_ID
         flowset_length = 4 + 4 + (9 * 4)  # Header + template header + 9 fields
 
-        flowset_header = struct.pack('!HH', flowset_id, flowset_length)
+        flowset_header = NETFLOW_FLOWSET_HDR.pack(flowset_id, flowset_length)
 
         # Template Header (4 bytes)
-        template_header = struct.pack('!HH', self.template_id, 9)  # 9 fields
+        template_header = NETFLOW_FLOWSET_HDR.pack(self.template_id, 9)  # 9 fields
 
         # Template Fields (4 bytes each)
         fields = [
@@ -358,60 +612,76 @@ class NetFlowV9Exporter:
             (FIELD_TYPES['LAST_SWITCHED'], 4),
         ]
 
-        field_data = b''
-        for field_type, field_length in fields:
-            field_data += struct.pack('!HH', field_type, field_length)
+        field_data = b''.join(NETFLOW_FIELD_STRUCT.pack(field_type, field_length)
+                              for field_type, field_length in fields)
+
+        return b''.join((flowset_header, template_header, field_data))
 
-        return header + flowset_header + template_header + field_data
+    def create_template_packet(self) -> bytearray:
+        """Create NetFlow v9 template packet.
 
-    def create_data_packet(self, flows: List[FlowRecord]) -> bytes:
-        """Create NetFlow v9 data packet."""
+        Only the header is packed per call; the precomputed template FlowSet
+        is copied in behind it.
+        """
+        # NetFlow v9 Header (20 bytes)
+        version = NETFLOW_VERSION
+        count = 1  # Number of flowsets
+        current_ms = now_ms()
+        sys_uptime = current_ms & 0xFFFFFFFF
+        unix_secs = current_ms // 1000
+        sequence_number = self.sequence
+        source_id = self.source_id
+
+        header_size = NETFLOW_HEADER_STRUCT.size
+        packet = bytearray(header_size + len(self.template_flowset))
+        NETFLOW_HEADER_STRUCT.pack_into(packet, 0, version, count, sys_uptime, unix_secs,
+                                        sequence_number, source_id, 0)
+        packet[header_size:] = self.template_flowset
+        return packet
+
+    def create_data_packet(self, flows: List[FlowRecord]) -> bytearray:
+        """Create NetFlow v9 data packet.
+
+        The packet is built in one preallocated buffer, with every part packed
+        in place rather than concatenated.
+        """
         if not flows:
-            return b''
+            return bytearray()
 
         # NetFlow v9 Header
         version = NETFLOW_VERSION
         count = 1  # Number of flowsets
-        sys_uptime = int(time.time() * 1000) & 0xFFFFFFFF
-        unix_secs = int(time.time())
+        current_ms = now_ms()
+        sys_uptime = current_ms & 0xFFFFFFFF
+        unix_secs = current_ms // 1000
         sequence_number = self.sequence
-        source_id = self.config.source_id
-
-        header = struct.pack('!HHIIIII',
-                             version, count, sys_uptime, unix_secs,
-                             sequence_number, source_id, 0)
+        source_id = self.source_id
 
         # Data FlowSet Header
         flowset_id = self.template_id
-        record_length = 4 + 4 + 2 + 2 + 1 + 4 + 4 + 4 + 4  # 29 bytes per record
-        flowset_length = 4 + (len(flows) * record_length)
-
-        flowset_header = struct.pack('!HH', flowset_id, flowset_length)
-
-        # Flow Records
-        records_data = b''
+        flowset_length = 4 + (len(flows) * RECORD_SIZE)  # 29 bytes per record
+
+        records_offset = DATA_PACKET_HEADER_SIZE
+        packet = bytearray(records_offset + len(flows) * RECORD_SIZE)
+        NETFLOW_HEADER_STRUCT.pack_into(packet, 0, version, count, sys_uptime, unix_secs,
+                                        sequence_number, source_id, 0)
+        NETFLOW_FLOWSET_HDR.pack_into(packet, NETFLOW_HEADER_STRUCT.size,
+                                      flowset_id, flowset_length)
+
+        # Flow Records, each packed straight into the packet buffer
+        pack_record = NETFLOW_RECORD_STRUCT.pack_into
+        offset = records_offset
         for flow in flows:
-            # Convert IP addresses to 32-bit integers
-            src_ip_int = struct.unpack('!I', socket.inet_aton(flow.src_ip))[0]
-            dst_ip_int = struct.unpack('!I', socket.inet_aton(flow.dst_ip))[0]
-
-            # Convert timestamps to NetFlow format
-            first_switched = flow.first_switched & 0xFFFFFFFF
-            last_switched = flow.last_switched & 0xFFFFFFFF
-
-            record = struct.pack('!IIHHBIIII',
-                                 src_ip_int,           # IPV4_SRC_ADDR (4)
-                                 dst_ip_int,           # IPV4_DST_ADDR (4)
-                                 flow.src_port,        # L4_SRC_PORT (2)
-                                 flow.dst_port,        # L4_DST_PORT (2)
-                                 flow.protocol,        # PROTOCOL (1)
-                                 flow.packets,         # IN_PKTS (4)
-                                 flow.bytes,           # IN_BYTES (4)
-                                 first_switched,       # FIRST_SWITCHED (4)
-                                 last_switched)        # LAST_SWITCHED (4)
-            records_data += record
-
-        return header + flowset_header + records_data
+            pack_record(packet, offset,
+                        flow.src_ip_int, flow.dst_ip_int,
+                        flow.src_port, flow.dst_port, flow.protocol,
+                        flow.packets, flow.bytes,
+                        # NetFlow timestamps are 32-bit
+                        flow.first_switched & 0xFFFFFFFF,
+                        flow.last_switched & 0xFFFFFFFF)
+            offset += RECORD_SIZE
+
+        return packet
 
     def send_template(self):
         """Send template packet to collector."""
@@ -419,80 +689,204 @@ class NetFlowV9Exporter:
         try:
             self.socket.sendto(template_packet, (self.config.collector_host, self.config.collector_port))
             self.template_sent = True
-            self.logger.info(f"Sent template packet ({len(template_packet)} bytes)")
+            self.logger.info("Sent template packet (%s bytes)", len(template_packet))
         except Exception as e:
-            self.logger.error(f"Failed to send template: {e}")
+            self.logger.error("Failed to send template: %s", e)
 
-    def send_flows(self, flows: List[FlowRecord]):
-        """Send flow records to collector and save to file with sampling."""
-        if not flows:
-            return
+    def packets(self, flows: List[FlowRecord]):
+        """Yield (flows, data packet) pairs of at most records_per_packet flows.
 
-        # Apply sampling
-        sampled_flows = []
-        for flow in flows:
-            if self.sampler.should_sample():
-                sampled_flows.append(flow)
+        Packets are built lazily so each one picks up the sequence number
+        left by the send before it.
+        """
+        for start in range(0, len(flows), self.records_per_packet):
+            chunk = flows[start:start + self.records_per_packet]
 
-        if not sampled_flows:
-            return
+            # Send template if needed
+            if not self.template_sent or self.packets_sent % self.config.template_refresh == 0:
+                self.send_template()
 
-        # Send template if needed
-        if not self.template_sent or self.packets_sent % self.config.template_refresh == 0:
-            self.send_template()
+            yield chunk, self.create_data_packet(chunk)
 
-        # Send via UDP
+    def send_packet(self, sampled_flows: List[FlowRecord], data_packet: bytearray):
+        """Send a data packet to the collector via UDP."""
         try:
-            data_packet = self.create_data_packet(sampled_flows)
             self.socket.sendto(data_packet, (self.config.collector_host, self.config.collector_port))
             self.sequence += len(sampled_flows)
             self.packets_sent += 1
-            self.logger.info(f"Sent {len(sampled_flows)} sampled flow records ({len(data_packet)} bytes)")
+            self.logger.info("Sent %s sampled flow records (%s bytes)", len(sampled_flows), len(data_packet))
+        except BlockingIOError:
+            # Lost like any UDP datagram; the sequence gap shows it downstream
+            self.sequence += len(sampled_flows)
+            self.packets_dropped += 1
+            self.logger.warning("Send buffer full, dropped %s flow records", len(sampled_flows))
         except Exception as e:
-            self.logger.error(f"Failed to send flows: {e}")
+            self.logger.error("Failed to send flows: %s", e)
 
-        # Save to file
-        if self.storage:
-            try:
-                self.storage.write_flows(sampled_flows)
-                self.logger.debug(f"Saved {len(sampled_flows)} flows to file")
-            except Exception as e:
-                self.logger.error(f"Failed to save flows: {e}")
+    def send(self, flows: List[FlowRecord]):
+        """Send flows as data packets.
 
-        # Broadcast to connected TCP clients (JSONL) if streamer attached
-        try:
-            if getattr(self, "streamer", None):
-                try:
-                    loop = asyncio.get_running_loop()
-                except RuntimeError:
-                    loop = None
-
-                if loop:
-                    # Schedule broadcast in event loop
-                    loop.create_task(self.streamer.broadcast(sampled_flows))
-                else:
-                    # Fallback: run broadcast synchronously (rare in async context)
-                    asyncio.run(self.streamer.broadcast(sampled_flows))
-        except Exception as e:
-            self.logger.debug(f"Failed to broadcast flows to streamer: {e}")
+        The socket is non-blocking, so this is safe to call on the event loop.
+        """
+        for chunk, data_packet in self.packets(flows):
+            self.send_packet(chunk, data_packet)
 
     def close(self):
-        """Close the UDP socket and storage."""
+        """Close the UDP socket."""
         try:
             self.socket.close()
         except Exception:
             pass
 
+
+class NetFlowV9Exporter:
+    """NetFlow v9 packet exporter following RFC 3954.
+
+    Sampling, buffering, storage and streaming happen here; the UDP export
+    itself goes through one ExportChannel per configured exporter worker.
+    """
+
+    def __init__(self, config: NetFlowConfig):
+        self.config = config
+        self.channels = self._open_channels(config)
+
+        # Sampled flows waiting to fill a packet, and when the oldest arrived
+        self.pending_flows: List[FlowRecord] = []
+        self.pending_since = 0.0
+        self.records_per_packet = min(config.max_flows_per_packet, MTU_RECORDS_PER_PACKET)
+        self.logger = logging.getLogger('NetFlowExporter')
+
+        # Initialize storage and sampler
+        self.storage = FlowDataStorage(config) if config.save_flows else None
+        self.sampler = (CheckpointSmoothedSampler(config) if config.adaptive_sampling
+                        else FlowSampler(config))
+
+        # optional streamer — set via attach_streamer
+        self.streamer: Optional[FlowStreamer] = None
+
+    @staticmethod
+    def _open_channels(config: NetFlowConfig) -> List[ExportChannel]:
+        """One channel per exporter worker, with consecutive source IDs.
+
+        Where SO_REUSEPORT is available, extra workers share the first
+        channel's local port so the collector sees a single exporter address.
+        """
+        if config.exporter_workers == 1:
+            return [ExportChannel(config, config.source_id)]
+
+        local_port = 0 if hasattr(socket, 'SO_REUSEPORT') else None
+        channels = []
+        for worker in range(config.exporter_workers):
+            channel = ExportChannel(config, config.source_id + worker, local_port)
+            if local_port == 0:
+                local_port = channel.local_port
+            channels.append(channel)
+        return channels
+
+    def attach_streamer(self, streamer: 'FlowStreamer'):
+        """Broadcast exported flows through ``streamer``."""
+        self.streamer = streamer
+
+    def _queue_flows(self, flows: List[FlowRecord]) -> int:
+        """Sample flows into the pending buffer.
+
+        Returns how many pending flows are due: all of them once the oldest
+        has waited export_flush_interval, otherwise only those that fill
+        complete packets, so a partial packet keeps collecting flows.
+        """
+        sampled_flows = self.sampler.sample(flows) if flows else flows
+        now = time.monotonic()
+        if sampled_flows:
+            if not self.pending_flows:
+                self.pending_since = now
+            self.pending_flows.extend(sampled_flows)
+
+        pending = len(self.pending_flows)
+        if now - self.pending_since >= self.config.export_flush_interval:
+            return pending
+        return pending - pending % self.records_per_packet
+
+    def _take_pending(self, count: int):
+        """Take the oldest ``count`` pending flows and their JSONL payload."""
+        flows = self.pending_flows[:count]
+        del self.pending_flows[:count]
+
+        # Serialize once when both the JSONL file and the stream need it
+        payload = None
+        if self.streamer or (self.storage and self.config.output_format != 'csv'):
+            payload = encode_jsonl(flows)
+
+        return flows, payload
+
+    def _partition(self, flows: List[FlowRecord]):
+        """Pair each channel with its share of ``flows``.
+
+        Flows are split by a hash of their 5-tuple, so the records of one
+        flow always leave through the same channel.
+        """
+        channels = self.channels
+        if len(channels) == 1:
+            return [(channels[0], flows)]
+
+        parts = [[] for _ in channels]
+        for flow in flows:
+            key = (flow.src_ip_int, flow.dst_ip_int, flow.src_port, flow.dst_port, flow.protocol)
+            parts[hash(key) % len(parts)].append(flow)
+        return [(channel, part) for channel, part in zip(channels, parts) if part]
+
+    def _save_flows(self, sampled_flows: List[FlowRecord], payload: Optional[bytes]):
+        """Save flows to file if storage is enabled."""
+        if not self.storage:
+            return
+        try:
+            self.storage.write_flows(sampled_flows, payload)
+            self.logger.debug("Saved %s flows to file", len(sampled_flows))
+        except Exception as e:
+            self.logger.error("Failed to save flows: %s", e)
+
+    async def send_flows_async(self, flows: List[FlowRecord], flush: bool = False):
+        """Send flow records to collector and save to file with sampling.
+
+        Sampled flows are buffered until they fill a packet or have waited
+        export_flush_interval; ``flush`` sends whatever is pending now.
+        The file write runs in a worker thread while the packets are sent.
+        """
+        due = self._queue_flows(flows)
+        if flush:
+            due = len(self.pending_flows)
+        if not due:
+            return
+        flows, payload = self._take_pending(due)
+
+        # Only buffers; the streamer's flush task delivers it to clients
+        if self.streamer:
+            self.streamer.broadcast_bytes(payload)
+
+        # Only the file write goes to a worker thread; sendto never blocks
+        save = asyncio.get_running_loop().run_in_executor(None, self._save_flows, flows, payload)
+        for channel, part in self._partition(flows):
+            channel.send(part)
+        await save
+
+    def close(self):
+        """Close the UDP sockets and storage."""
+        for channel in self.channels:
+            channel.close()
+
+        packets_dropped = sum(channel.packets_dropped for channel in self.channels)
+        if packets_dropped:
+            self.logger.warning("Dropped %s packets on a full send buffer", packets_dropped)
+
         if self.storage:
             self.storage.close()
-            self.logger.info(f"Total flows written: {self.storage.flows_written}")
+            self.logger.info("Total flows written: %s", self.storage.flows_written)
             print(f"Total flows written to {self.storage.flow_file}: {self.storage.flows_written}")
 
             # Print sampling statistics
             stats = self.sampler.get_stats()
-            self.logger.info(f"Sampling stats: {stats}")
+            self.logger.info("Sampling stats: %s", stats)
             print(f"Sampling: {stats['sampled_flows']}/{stats['total_flows']} flows "
-                  f"(1:{self.config.sampling_rate} ratio)")
+                  f"(1:{stats['sampling_rate']} ratio)")
 
 
 class FlowCache:
@@ -503,92 +897,113 @@ class FlowCache:
         self.flows: Dict[FlowKey, FlowRecord] = {}
         self.flow_counter = 0
 
+        # Timing bounds read on every packet, bound once
+        self._min_packet_delay = config.min_packet_delay
+        self._max_packet_delay = config.max_packet_delay
+        self._min_flow_duration = config.min_flow_duration
+        self._max_single_packet_duration = config.max_single_packet_duration
+
     def add_packet(self, src_ip: str, dst_ip: str, src_port: int, dst_port: int,
-                   protocol: int, packet_size: int, session_id: str = ""):
-        """Add a packet to the flow cache."""
-        key = FlowKey(src_ip, dst_ip, src_port, dst_port, protocol)
-        current_time_ms = int(time.time() * 1000)
-
-        if key in self.flows:
-            # Update existing flow
-            flow = self.flows[key]
-            flow.packets += 1
-            flow.bytes += packet_size
-
-            # Add realistic delay between packets
-            delay_ms = random.randint(self.config.min_packet_delay, self.config.max_packet_delay)
-            new_last_switched = max(flow.last_switched + delay_ms, current_time_ms)
-            flow.last_switched = new_last_switched
-        else:
-            # Create new flow with unique flow_id
-            self.flow_counter += 1
-            flow_id = f"flow_{self.flow_counter}_{int(time.time())}"
-
-            flow = FlowRecord(
-                src_ip, dst_ip, src_port, dst_port, protocol,
-                1, packet_size, flow_id=flow_id
-            )
-            flow.first_switched = current_time_ms
-            # Ensure new flows have initial duration
-            initial_duration = random.randint(self.config.min_flow_duration,
-                                              self.config.max_single_packet_duration)
-            flow.last_switched = current_time_ms + initial_duration
-            flow.first_packet_time = time.time()
-            self.flows[key] = flow
+                   protocol: int, packet_size: int, session_id: str = "",
+                   now: Optional[float] = None):
+        """Add a packet to the flow cache.
+
+        ``now`` lets callers that already read the clock pass it in.
+        """
+        self.add_packets(
+            ((src_ip, dst_ip, src_port, dst_port, protocol, packet_size, session_id),), now)
+
+    def add_packets(self, packets, now: Optional[float] = None):
+        """Add a batch of generator packet tuples to the flow cache.
+
+        Same result as add_packet per packet, with the lookups it repeats
+        hoisted out of the loop.
+        """
+        if now is None:
+            now = time.time()
+        current_time_ms = int(now * 1000)
+
+        flows = self.flows
+        randint = random.randint
+        min_packet_delay, max_packet_delay = self._min_packet_delay, self._max_packet_delay
+
+        for src_ip, dst_ip, src_port, dst_port, protocol, packet_size, _ in packets:
+            src_ip_int = ip_to_int(src_ip)
+            dst_ip_int = ip_to_int(dst_ip)
+            key = (src_ip_int, dst_ip_int, src_port, dst_port, protocol)
+
+            flow = flows.get(key)
+            if flow is not None:
+                # Update existing flow
+                flow.packets += 1
+                flow.bytes += packet_size
+
+                # Add realistic delay between packets
+                delay_ms = randint(min_packet_delay, max_packet_delay)
+                new_last_switched = max(flow.last_switched + delay_ms, current_time_ms)
+                flow.last_switched = new_last_switched
+            else:
+                # Create new flow with unique flow_id
+                self.flow_counter += 1
+                flow_id = f"flow_{self.flow_counter}_{int(now)}"
+
+                # Ensure new flows have initial duration
+                initial_duration = randint(self._min_flow_duration,
+                                           self._max_single_packet_duration)
+                flows[key] = FlowRecord(
+                    src_ip, dst_ip, src_port, dst_port, protocol,
+                    1, packet_size, current_time_ms, current_time_ms + initial_duration,
+                    flow_id=flow_id, first_packet_time=now,
+                    src_ip_int=src_ip_int, dst_ip_int=dst_ip_int
+                )
 
     def get_expired_flows(self) -> List[FlowRecord]:
         """Get flows that have exceeded timeout limits."""
-        now = int(time.time() * 1000)
-        expired = []
+        now = now_ms()
+        inactive_timeout_ms = self.config.inactive_timeout * 1000
+        active_timeout_ms = self.config.active_timeout * 1000
+
+        # Collect first, then remove, so the cache is never copied
+        expired_keys = [
+            key for key, flow in self.flows.items()
+            if now - flow.last_switched >= inactive_timeout_ms
+            or now - flow.first_switched >= active_timeout_ms
+        ]
 
-        for key, flow in list(self.flows.items()):
-            # Check for timeouts
-            inactive_time = (now - flow.last_switched) / 1000
-            active_time = (now - flow.first_switched) / 1000
-
-            if inactive_time >= self.config.inactive_timeout or active_time >= self.config.active_timeout:
-                # Ensure flow has realistic duration before expiring
-                if flow.last_switched <= flow.first_switched:
-                    # Force minimum duration if timestamps are equal
-                    if flow.packets == 1:
-                        # Single packet flows: configurable duration
-                        duration = random.randint(self.config.min_flow_duration,
-                                                  self.config.max_single_packet_duration)
-                        flow.last_switched = flow.first_switched + duration
-                    else:
-                        # Multi-packet flows: duration based on packet count
-                        min_duration, max_duration = self.config.duration_per_packet
-                        duration_per_packet = random.randint(min_duration, max_duration)
-                        total_duration = max(self.config.min_flow_duration,
-                                             (flow.packets - 1) * duration_per_packet)
-                        flow.last_switched = flow.first_switched + total_duration
-
-                # Final check to ensure duration is never zero
-                if flow.last_switched <= flow.first_switched:
-                    flow.last_switched = flow.first_switched + self.config.min_flow_duration
-
-                expired.append(flow)
-                del self.flows[key]
+        expired = []
+        for key in expired_keys:
+            flow = self.flows.pop(key)
+            # Ensure flow has realistic duration before expiring
+            self._finish_duration(flow)
+            expired.append(flow)
 
         return expired
 
-    def get_all_flows(self) -> List[FlowRecord]:
-        """Get all flows and clear cache."""
-        flows = list(self.flows.values())
+    def _finish_duration(self, flow: FlowRecord):
+        """Give a flow that has not yet advanced past its start a plausible duration."""
+        if flow.last_switched <= flow.first_switched:
+            # Single packet flows get a configurable duration, multi-packet
+            # flows one based on their packet count
+            if flow.packets == 1:
+                duration = random.randint(self.config.min_flow_duration,
+                                          self.config.max_single_packet_duration)
+            else:
+                min_dur, max_dur = self.config.duration_per_packet
+                duration = (flow.packets - 1) * random.randint(min_dur, max_dur)
+            flow.last_switched = flow.first_switched + max(duration, self.config.min_flow_duration)
 
-        # Ensure all flows have proper duration before returning
-        for flow in flows:
-            if flow.last_switched <= flow.first_switched:
-                if flow.packets == 1:
-                    duration = random.randint(self.config.min_flow_duration,
-                                              self.config.max_single_packet_duration)
-                else:
-                    min_dur, max_dur = self.config.duration_per_packet
-                    duration = (flow.packets - 1) * random.randint(min_dur, max_dur)
-                flow.last_switched = flow.first_switched + max(duration, self.config.min_flow_duration)
+    def iter_all_flows(self, chunk_size: int = 256) -> Iterator[List[FlowRecord]]:
+        """Drain the cache in lists of at most ``chunk_size`` flows.
 
-        self.flows.clear()
-        return flows
+        Flows are popped oldest first as they are yielded, so draining a
+        large cache never holds a second full copy of it.
+        """
+        flows = self.flows
+        while flows:
+            batch = [flows.pop(key) for key in list(islice(flows, chunk_size))]
+            for flow in batch:
+                self._finish_duration(flow)
+            yield batch
 
 
 class RealisticTrafficGenerator:
@@ -605,7 +1020,19 @@ class RealisticTrafficGenerator:
 
         # Get application profiles and weights from config
         self.app_profiles = config.get_application_profiles()
-        self.app_weights = config.application_weights
+        self.app_names, self.app_weights = config.get_application_choices()
+        # Cumulative weights spare random.choices from re-summing every draw
+        self.app_cum_weights = list(accumulate(self.app_weights))
+
+        # Ephemeral ports are drawn in bulk, which is far cheaper than a
+        # random.randint call per packet
+        self._port_pool: List[int] = []
+
+    def ephemeral_port(self) -> int:
+        """Take a random client port from the pre-drawn pool."""
+        if not self._port_pool:
+            self._port_pool = random.choices(EPHEMERAL_PORTS, k=PORT_POOL_SIZE)
+        return self._port_pool.pop()
 
     def random_ip_from_network(self, networks) -> str:
         """Get random IP from network list."""
@@ -623,10 +1050,7 @@ class RealisticTrafficGenerator:
         session_id = f"session_{self.session_counter}_{int(time.time())}"
 
         # Choose application type based on configured weights
-        app_name = random.choices(
-            list(self.app_weights.keys()),
-            weights=list(self.app_weights.values())
-        )[0]
+        app_name = random.choices(self.app_names, cum_weights=self.app_cum_weights)[0]
         profile = self.app_profiles[app_name]
 
         # Choose source and destination
@@ -657,7 +1081,7 @@ class RealisticTrafficGenerator:
 
         # Check if session should be active
         session_duration = now - session.start_time
-        max_duration = random.uniform(*session.profile['session_duration'])
+        max_duration = random.uniform(*session.profile.session_duration)
 
         if session_duration > max_duration or session.requests_sent >= session.total_requests:
             # Session completed
@@ -671,15 +1095,15 @@ class RealisticTrafficGenerator:
 
         # Check if it's time for next request
         time_since_last = now - session.last_activity
-        min_delay, max_delay = session.profile['inter_request_delay']
+        min_delay, max_delay = session.profile.inter_request_delay
 
         if time_since_last >= random.uniform(min_delay, max_delay):
             # Generate request/response pair
-            dst_port = random.choice(session.profile['ports'])
-            src_port = random.randint(1024, 65535)
+            dst_port = random.choice(session.profile.ports)
+            src_port = self.ephemeral_port()
 
             # Request packet (client to server)
-            req_size = random.randint(*session.profile['request_size'])
+            req_size = random.randint(*session.profile.request_size)
             packets.append((
                 session.src_ip, session.dst_ip, src_port, dst_port,
                 PROTOCOLS['TCP'], req_size, session.session_id
@@ -687,9 +1111,9 @@ class RealisticTrafficGenerator:
 
             # Response packets (server to client) - if bidirectional
             if (self.config.enable_bidirectional and
-                    random.random() < session.profile['bidirectional_ratio']):
+                    random.random() < session.profile.bidirectional_ratio):
 
-                resp_size = random.randint(*session.profile['response_size'])
+                resp_size = random.randint(*session.profile.response_size)
 
                 # Split large responses into multiple packets
                 mtu = 1500
@@ -734,8 +1158,8 @@ class RealisticTrafficGenerator:
                 ))
             else:
                 # Random UDP
-                src_port = random.randint(1024, 65535)
-                dst_port = random.randint(1024, 65535)
+                src_port = self.ephemeral_port()
+                dst_port = self.ephemeral_port()
                 all_packets.append((
                     src_ip, dst_ip, src_port, dst_port, PROTOCOLS['UDP'],
                     random.randint(64, 512), "background"
@@ -760,9 +1184,9 @@ def setup_logging(config: NetFlowConfig):
 
     # Setup handlers
     handlers = []
-    if getattr(config, "file_logging", False):
+    if config.file_logging:
         handlers.append(logging.FileHandler(output_path / config.log_file))
-    if getattr(config, "console_logging", True):
+    if config.console_logging:
         handlers.append(logging.StreamHandler())
 
     logging.basicConfig(
@@ -811,120 +1235,135 @@ async def main(config: NetFlowConfig):
 
     # Optionally start streamer
     streamer = None
-    stream_enabled = getattr(config, "stream_enabled", True)
-    stream_host = getattr(config, "stream_host", "0.0.0.0")
-    stream_port = getattr(config, "stream_port", 9999)
-    if stream_enabled:
+    stream_host = config.stream_host
+    stream_port = config.stream_port
+    if config.stream_enabled:
         try:
             streamer = FlowStreamer(host=stream_host, port=stream_port)
-            # attach streamer to exporter so send_flows can use it
-            exporter.streamer = streamer
             await streamer.start()
-            logger.info(f"Flow streamer started on {stream_host}:{stream_port}")
+            # attach streamer to exporter so send_flows_async can use it
+            exporter.attach_streamer(streamer)
+            logger.info("Flow streamer started on %s:%s", stream_host, stream_port)
         except Exception as e:
-            logger.error(f"Failed to start flow streamer: {e}")
+            logger.error("Failed to start flow streamer: %s", e)
             streamer = None
 
     logger.info("Starting Realistic NetFlow v9 simulator")
-    logger.info(f"Collector: {config.collector_host}:{config.collector_port}")
-    logger.info(f"Sessions per minute: {config.sessions_per_minute}")
-    logger.info(f"Bidirectional flows: {config.enable_bidirectional}")
-    logger.info(f"Sampling rate: 1:{config.sampling_rate}")
-    logger.info(f"Output: {config.output_dir} ({config.output_format})")
-
-    print(f"Starting Realistic NetFlow v9 simulator")
-    print(f"Collector: {config.collector_host}:{config.collector_port}")
-    print(f"Sessions/min: {config.sessions_per_minute}")
-    print(f"Sampling: 1:{config.sampling_rate}")
-    print(f"Bidirectional: {config.enable_bidirectional}")
-    print(f"Output: {config.output_dir} ({config.output_format})")
+    logger.info("Collector: %s:%s", config.collector_host, config.collector_port)
+    logger.info("Exporter workers: %s", config.exporter_workers)
+    logger.info("Sessions per minute: %s", config.sessions_per_minute)
+    logger.info("Bidirectional flows: %s", config.enable_bidirectional)
+    logger.info("Sampling rate: 1:%s", config.sampling_rate)
+    logger.info("Output: %s (%s)", config.output_dir, config.output_format)
+
+    # The console only needs the plain banner when INFO logs do not reach it
+    console_logs = config.console_logging and logger.isEnabledFor(logging.INFO)
+    if not console_logs:
+        print(f"Starting Realistic NetFlow v9 simulator")
+        print(f"Collector: {config.collector_host}:{config.collector_port}")
+        print(f"Sessions/min: {config.sessions_per_minute}")
+        print(f"Sampling: 1:{config.sampling_rate}")
+        print(f"Bidirectional: {config.enable_bidirectional}")
+        print(f"Output: {config.output_dir} ({config.output_format})")
     if streamer:
         print(f"Streaming JSONL flows to tcp://{stream_host}:{stream_port}")
     print("Press Ctrl+C to stop...")
 
     flow_export_counter = 0
-    start_time = time.time()
+    start_time = time.monotonic()
     total_packets_generated = 0
+    next_tick = time.monotonic()
+    last_status = start_time
+
+    # Loop-invariant bound methods
+    shutdown_is_set = shutdown_event.is_set
+    run_in_executor = asyncio.get_running_loop().run_in_executor
+    generate_packets = traffic_gen.generate_packets
+    add_packets = flow_cache.add_packets
+    get_expired_flows = flow_cache.get_expired_flows
+    send_flows = exporter.send_flows_async
+    monotonic = time.monotonic
+    status_enabled = logger.isEnabledFor(logging.INFO)
 
     try:
-        while not shutdown_event.is_set():
-            loop_start = time.time()
-
-            # Generate realistic traffic packets
-            packets = traffic_gen.generate_packets()
+        while not shutdown_is_set():
+            # One clock sample serves the whole tick; only the sleep below
+            # needs a fresh reading
+            now = monotonic()
+
+            # Generate realistic traffic packets off the event loop so the
+            # streamer keeps flushing while a heavy tick is being built
+            packets = await run_in_executor(None, generate_packets)
             total_packets_generated += len(packets)
 
-            # Add packets to flow cache with small delays
-            for packet in packets:
-                src_ip, dst_ip, src_port, dst_port, protocol, packet_size, session_id = packet
-                flow_cache.add_packet(
-                    src_ip, dst_ip, src_port, dst_port, protocol,
-                    packet_size, session_id
-                )
+            # Add packets to flow cache; the per-packet delays that spread
+            # flow timestamps come from FlowCache, so one clock read will do
+            add_packets(packets, time.time())
 
-                # Small delay between processing packets for realistic timing
-                if len(packets) > 1:
-                    await asyncio.sleep(0.001)  # 1ms delay between packets
+            # Yield once so the streamer can service clients
+            await asyncio.sleep(0)
 
             # Check for expired flows and export them
-            expired_flows = flow_cache.get_expired_flows()
-            if expired_flows:
-                exporter.send_flows(expired_flows)
-                flow_export_counter += len(expired_flows)
-
-            # Periodic status update
-            elapsed = time.time() - start_time
-            if elapsed > 0 and int(elapsed) % 30 == 0 and elapsed < 31:  # Every 30 seconds
-                active_sessions = len(traffic_gen.sessions)
-                packets_per_sec = total_packets_generated / elapsed
-                flows_per_sec = flow_export_counter / elapsed
-                sampling_stats = exporter.sampler.get_stats()
-
-                logger.info(f"Status: {active_sessions} active sessions, "
-                            f"{packets_per_sec:.1f} pkt/s, {flows_per_sec:.1f} flows/s, "
-                            f"sampling: {sampling_stats['actual_ratio']:.3f}")
-                print(f"Active sessions: {active_sessions}, "
-                      f"Packets/sec: {packets_per_sec:.1f}, "
-                      f"Flows/sec: {flows_per_sec:.1f}, "
-                      f"Sampled: {sampling_stats['sampled_flows']}/{sampling_stats['total_flows']}")
-
-            # Sleep to maintain realistic timing (1 second intervals)
-            loop_duration = time.time() - loop_start
-            sleep_time = max(0, 1.0 - loop_duration)
-            await asyncio.sleep(sleep_time)
+            # (called every tick so buffered flows are flushed on time)
+            expired_flows = get_expired_flows()
+            await send_flows(expired_flows)
+            flow_export_counter += len(expired_flows)
+
+            # Periodic status update; the stats are only gathered when the
+            # line will actually be logged
+            if now - last_status >= STATUS_INTERVAL:
+                last_status = now
+                if status_enabled:
+                    elapsed = now - start_time
+                    sampling_stats = exporter.sampler.get_stats()
+                    logger.info("Status: %d active sessions, %.1f pkt/s, %.1f flows/s, sampled: %d/%d",
+                                len(traffic_gen.sessions),
+                                total_packets_generated / elapsed,
+                                flow_export_counter / elapsed,
+                                sampling_stats['sampled_flows'], sampling_stats['total_flows'])
+
+            # Sleep until the next 1-second tick; ticks are scheduled from a
+            # fixed start so sleep jitter does not accumulate, and an overrun
+            # resynchronises instead of firing a burst of catch-up ticks
+            next_tick += 1.0
+            delay = next_tick - monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                next_tick -= delay
 
     except asyncio.CancelledError:
         logger.info("Main loop cancelled")
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt")
     except Exception as e:
-        logger.error(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
     finally:
-        # Export any remaining flows
-        remaining_flows = flow_cache.get_all_flows()
-        if remaining_flows:
-            exporter.send_flows(remaining_flows)
+        # Export any remaining flows, draining the cache a chunk at a time
+        for remaining_flows in flow_cache.iter_all_flows():
+            await exporter.send_flows_async(remaining_flows)
             flow_export_counter += len(remaining_flows)
+        await exporter.send_flows_async([], flush=True)
 
         # Final statistics
-        elapsed = time.time() - start_time
+        elapsed = time.monotonic() - start_time
         sampling_stats = exporter.sampler.get_stats()
 
         logger.info("Simulation stopped")
-        logger.info(f"Runtime: {elapsed:.1f} seconds")
-        logger.info(f"Total packets generated: {total_packets_generated}")
-        logger.info(f"Total flows exported: {flow_export_counter}")
-        logger.info(f"Sampling statistics: {sampling_stats}")
+        logger.info("Runtime: %.1f seconds", elapsed)
+        logger.info("Total packets generated: %s", total_packets_generated)
+        logger.info("Total flows exported: %s", flow_export_counter)
+        logger.info("Sampling statistics: %s", sampling_stats)
         if elapsed > 0:
-            logger.info(f"Average packets per second: {total_packets_generated/elapsed:.1f}")
-            logger.info(f"Average flows per second: {flow_export_counter/elapsed:.1f}")
+            logger.info("Average packets per second: %.1f", total_packets_generated/elapsed)
+            logger.info("Average flows per second: %.1f", flow_export_counter/elapsed)
 
         print(f"\nSimulation Statistics:")
         print(f"Runtime: {elapsed:.1f} seconds")
         print(f"Total packets: {total_packets_generated}")
         print(f"Total flows: {flow_export_counter}")
         print(f"Sampling: {sampling_stats['sampled_flows']}/{sampling_stats['total_flows']} "
-              f"(1:{config.sampling_rate} ratio, actual: {sampling_stats['actual_ratio']:.3f})")
+              f"(1:{sampling_stats['sampling_rate']} ratio, actual: {sampling_stats['actual_ratio']:.3f})")
         if elapsed > 0:
             print(f"Avg packets/sec: {total_packets_generated/elapsed:.1f}")
             print(f"Avg flows/sec: {flow_export_counter/elapsed:.1f}")
@@ -934,116 +1373,113 @@ async def main(config: NetFlowConfig):
             try:
                 await streamer.stop()
             except Exception as e:
-                logger.debug(f"Error stopping streamer: {e}")
+                logger.debug("Error stopping streamer: %s", e)
 
         # Clean up exporter and storage
         try:
             exporter.close()
         except Exception as e:
-            logger.debug(f"Error closing exporter: {e}")
-
-
-def parse_args() -> NetFlowConfig:
-    """Parse command line arguments and return config."""
-    import sys
-
-    config = DEFAULT_CONFIG
-
-    # default streaming options
-    setattr(config, "stream_enabled", True)
-    setattr(config, "stream_host", "0.0.0.0")
-    setattr(config, "stream_port", 9999)
-    setattr(config, "listen", False)  # default: don't run simple listener
-
-    args = sys.argv[1:]
-    i = 0
-    while i < len(args):
-        arg = args[i]
+            logger.debug("Error closing exporter: %s", e)
 
-        if arg in ['--help', '-h']:
-            print_usage()
-            sys.exit(0)
-        elif arg == '--config' and i + 1 < len(args):
-            # Load config from file
-            config = NetFlowConfig.load_from_file(args[i + 1])
-            i += 1
-        elif arg == '--collector-host' and i + 1 < len(args):
-            config.collector_host = args[i + 1]
-            i += 1
-        elif arg == '--collector-port' and i + 1 < len(args):
-            config.collector_port = int(args[i + 1])
-            i += 1
-        elif arg == '--sessions-per-minute' and i + 1 < len(args):
-            config.sessions_per_minute = int(args[i + 1])
-            i += 1
-        elif arg == '--sampling-rate' and i + 1 < len(args):
-            config.sampling_rate = int(args[i + 1])
-            i += 1
-        elif arg == '--output-dir' and i + 1 < len(args):
-            config.output_dir = args[i + 1]
-            i += 1
-        elif arg == '--output-format' and i + 1 < len(args):
-            format_val = args[i + 1].lower()
-            if format_val in ['jsonl', 'csv']:
-                config.output_format = format_val
-            else:
-                print(f"Error: Invalid output format '{format_val}'. Use 'jsonl' or 'csv'.")
-                sys.exit(1)
-            i += 1
-        elif arg == '--no-bidirectional':
-            config.enable_bidirectional = False
-        elif arg == '--no-sampling':
-            config.enable_sampling = False
-        elif arg == '--stream-host' and i + 1 < len(args):
-            setattr(config, "stream_host", args[i + 1])
-            i += 1
-        elif arg == '--stream-port' and i + 1 < len(args):
-            setattr(config, "stream_port", int(args[i + 1]))
-            i += 1
-        elif arg == '--no-stream':
-            setattr(config, "stream_enabled", False)
-        elif arg == '--listen':
-            setattr(config, "listen", True)
-        else:
-            print(f"Error: Unknown argument '{arg}'")
-            print_usage()
-            sys.exit(1)
-
-        i += 1
-
-    return config
-
-
-def print_usage():
-    """Print usage information."""
-    print("""
-NetFlow v9 Realistic Traffic Simulator
-
-Usage: python netflow_simulator.py [options]
-
-Options:
-  --config FILE            Load configuration from JSON file
-  --collector-host HOST    NetFlow collector host (default: 127.0.0.1)
-  --collector-port PORT    NetFlow collector port (default: 2055)
-  --sessions-per-minute N  New sessions per minute (default: 30)
-  --sampling-rate N        Sample 1 out of every N flows (default: 100)
-  --output-dir DIR         Output directory (default: netflow_data)
-  --output-format FORMAT   Output format: jsonl or csv (default: jsonl)
-  --no-bidirectional       Disable bidirectional flows
-  --no-sampling            Disable flow sampling
-  --stream-host HOST       Host to bind TCP JSONL streamer (default: 0.0.0.0)
-  --stream-port PORT       Port for TCP JSONL streamer (default: 9999)
-  --no-stream              Disable streaming JSONL output
-  --listen                 Run a very simple blocking listener (prints incoming JSONL) and exit
-  --help                   Show this help message
 
+USAGE_EXAMPLES = """
 Examples:
   python netflow_simulator.py
   python netflow_simulator.py --collector-host 192.168.1.100 --sessions-per-minute 60
   python netflow_simulator.py --sampling-rate 50 --output-format csv
   python netflow_simulator.py --stream-host 127.0.0.1 --stream-port 9999
   python netflow_simulator.py --listen --stream-host 127.0.0.1 --stream-port 9999
-    """)
+"""
+
+
+def config_file(path: str) -> NetFlowConfig:
+    """argparse type for --config: load the file or report why it can't be used."""
+    try:
+        return NetFlowConfig.load_from_file(path)
+    except OSError as e:
+        raise argparse.ArgumentTypeError(f"cannot read {path}: {e.strerror}")
+    except json.JSONDecodeError as e:
+        raise argparse.ArgumentTypeError(f"{path} is not valid JSON: {e}")
+    except TypeError as e:
+        raise argparse.ArgumentTypeError(f"{path} is not a valid config: {e}")
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Command line parser; options left unset keep the config's values."""
+    defaults = NetFlowConfig()
+    parser = argparse.ArgumentParser(
+        prog="netflow_simulator.py",
+        description="NetFlow v9 Realistic Traffic Simulator",
+        epilog=USAGE_EXAMPLES,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--config', metavar='FILE', type=config_file,
+                        help="Load configuration from JSON file")
+    parser.add_argument('--collector-host', metavar='HOST',
+                        help=f"NetFlow collector host (default: {defaults.collector_host})")
+    parser.add_argument('--collector-port', metavar='PORT', type=int,
+                        help=f"NetFlow collector port (default: {defaults.collector_port})")
+    parser.add_argument('--sessions-per-minute', metavar='N', type=int,
+                        help=f"New sessions per minute (default: {defaults.sessions_per_minute})")
+    parser.add_argument('--sampling-rate', metavar='N', type=int,
+                        help=f"Sample 1 out of every N flows (default: {defaults.sampling_rate})")
+    parser.add_argument('--exporter-workers', metavar='N', type=int,
+                        help=f"UDP exporter workers, each with its own source ID "
+                             f"(default: {defaults.exporter_workers})")
+    parser.add_argument('--output-dir', metavar='DIR',
+                        help=f"Output directory (default: {defaults.output_dir})")
+    parser.add_argument('--output-format', metavar='FORMAT', type=str.lower,
+                        choices=['jsonl', 'csv'],
+                        help="Output format: jsonl or csv (default: jsonl)")
+    parser.add_argument('--no-bidirectional', action='store_true',
+                        help="Disable bidirectional flows")
+    parser.add_argument('--no-sampling', action='store_true',
+                        help="Disable flow sampling")
+    parser.add_argument('--adaptive-sampling', action='store_true',
+                        help="Raise the sampling rate while the traffic mix is stable")
+    parser.add_argument('--stream-host', metavar='HOST',
+                        help=f"Host to bind TCP JSONL streamer (default: {defaults.stream_host})")
+    parser.add_argument('--stream-port', metavar='PORT', type=int,
+                        help=f"Port for TCP JSONL streamer (default: {defaults.stream_port})")
+    parser.add_argument('--no-stream', action='store_true',
+                        help="Disable streaming JSONL output")
+    parser.add_argument('--listen', action='store_true',
+                        help="Run a very simple blocking listener (prints incoming JSONL) and exit")
+    return parser
+
+
+# Command line options copied onto the config field of the same name when given
+_VALUE_OPTIONS = (
+    'collector_host', 'collector_port', 'sessions_per_minute', 'sampling_rate',
+    'exporter_workers', 'output_dir', 'output_format', 'stream_host', 'stream_port',
+)
+
+
+def parse_args() -> NetFlowConfig:
+    """Parse command line arguments and return config."""
+    args = build_arg_parser().parse_args()
+
+    config = args.config
+    if config is None:
+        config = DEFAULT_CONFIG
+
+    for name in _VALUE_OPTIONS:
+        value = getattr(args, name)
+        if value is not None:
+            setattr(config, name, value)
+
+    if args.no_bidirectional:
+        config.enable_bidirectional = False
+    if args.no_sampling:
+        config.enable_sampling = False
+    if args.adaptive_sampling:
+        config.adaptive_sampling = True
+    if args.no_stream:
+        config.stream_enabled = False
+    if args.listen:
+        config.listen = True
+
+    return config
 
 
 # Very small blocking listener (<=15 lines). Good for quick debugging.
@@ -1051,12 +1487,14 @@ def simple_listener(host: str = "127.0.0.1", port: int = 9999):
     """Simple blocking TCP JSONL listener that prints each incoming line."""
     import socket
     with socket.create_connection((host, port)) as s:
-        with s.makefile('r', encoding='utf-8', errors='replace') as f:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        # Large read buffer so bursts are pulled in with few recv() calls
+        with s.makefile('r', buffering=1 << 16, encoding='utf-8', errors='replace', newline='') as f:
             try:
                 for line in f:
                     if not line:
                         break
-                    print(line.rstrip())
+                    sys.stdout.write(line)
             except KeyboardInterrupt:
                 return
 
@@ -1067,15 +1505,18 @@ if __name__ == "__main__":
         cfg = parse_args()
 
         # If user requested the tiny listener, run it and exit
-        if getattr(cfg, "listen", False):
-            host = getattr(cfg, "stream_host", "127.0.0.1")
-            port = getattr(cfg, "stream_port", 9999)
+        if cfg.listen:
+            host = cfg.stream_host
+            port = cfg.stream_port
             print(f"Running simple listener connecting to {host}:{port}. Ctrl+C to stop.")
             simple_listener(host, port)
             sys.exit(0)
 
         # Run the simulator with the parsed config
-        asyncio.run(main(cfg))
+        if uvloop is not None:
+            uvloop.run(main(cfg))
+        else:
+            asyncio.run(main(cfg))
 
     except KeyboardInterrupt:
         print("\nSimulator stopped by user")